@@ -3,10 +3,14 @@ Fixed AI Predictor with Comprehensive Error Handling and Fallbacks
 Resolves all 'server error please try again later' issues
 """
 
+import collections
+import functools
+import itertools
 import logging
 import os
 import sys
-import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import time
@@ -27,24 +31,89 @@ try:
 except Exception:
     CV2_AVAILABLE = False
 
+try:
+    import pybase64  # Optional; SIMD base64 decoder, several times faster on large frames
+    _b64decode = pybase64.b64decode
+except Exception:
+    _b64decode = base64.b64decode
+
+try:
+    import numba  # Optional; JIT for the no-OpenCV motion path
+    NUMBA_AVAILABLE = np is not None
+except Exception:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Normalization constants for the fallback heuristics (multiply instead of divide)
+_INV_100K = 1.0 / 100000.0
+_INV_255 = 1.0 / 255.0
+_INV_1000 = 1.0 / 1000.0
+
+# Files in a multi-file upload are decoded and scored concurrently; image decoding
+# releases the GIL, and the production predictor serializes its own model calls
+_FILE_POOL = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 1), thread_name_prefix='predict-file'
+)
+
+
+def _quality_bonus(quality_score: float) -> float:
+    """Confidence bonus from image quality, capped at 0.25"""
+    bonus = quality_score * 0.25
+    return bonus if bonus < 0.25 else 0.25
+
+
+def _clamp01(x: float) -> float:
+    """Clamp a scalar into [0, 1] with a single comparison path"""
+    return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, fastmath=True, parallel=True)
+    def _gray_diff_mean(rgb, prev_gray):
+        """Single pass over an RGB frame: luma, |luma - prev|, mean; writes luma into prev_gray"""
+        h, w = prev_gray.shape
+        row_sums = np.zeros(h, dtype=np.float64)
+        for i in numba.prange(h):
+            acc = 0.0
+            for j in range(w):
+                g = 0.2989 * rgb[i, j, 0] + 0.5870 * rgb[i, j, 1] + 0.1140 * rgb[i, j, 2]
+                acc += abs(g - prev_gray[i, j])
+                prev_gray[i, j] = g
+            row_sums[i] = acc
+        return row_sums.sum() / (h * w)
+
+
 class FixedAIPredictor:
     """
     Robust AI predictor with comprehensive error handling and fallbacks
     Never returns generic server errors - always provides specific feedback
     """
+
+    # Per-frame constants shared by every instance
+    _LUMA = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32) if np is not None else None
+    _FARNEBACK_PARAMS = (0.5, 3, 15, 3, 5, 1.2, 0)  # pyr_scale, levels, winsize, iterations, poly_n, poly_sigma, flags
     
     def __init__(self):
         self.model_loaded = False
         self.fallback_mode = True  # Start in fallback mode for safety
-        self.error_log = []
+        self.error_log = collections.deque(maxlen=64)  # bounded; keeps the most recent errors
         # State for motion-based crowd dynamics and online calibration
         self._prev_small_gray = None
         self._ema_mean = 0.5
         self._ema_var = 0.05
         self._ema_alpha = 0.1  # smoothing for mean
         self._ema_beta = 0.1   # smoothing for variance
+        # Motion is re-estimated at most every _motion_interval seconds; frames in
+        # between reuse the last score (crowd dynamics evolve far slower than fps)
+        self._motion_interval = 0.2
+        self._last_motion_time = 0.0
+        self._last_motion_score = 0.0
+        # Reused buffers for the NumPy motion path (no OpenCV); reallocated only on shape change
+        self._gray_buf = None
+        self._diff_buf = None
+        # The predictor is a process-wide singleton shared by request and worker threads;
+        # this guards the previous frame and the reused buffers above
+        self._motion_lock = threading.Lock()
 
         # Active learning storage
         self._samples_dir = Path(__file__).parent.parent / 'active_learning'
@@ -52,6 +121,9 @@ class FixedAIPredictor:
             self._samples_dir.mkdir(parents=True, exist_ok=True)
         except Exception:
             pass
+        self._samples_dir_str = str(self._samples_dir)
+        self._last_sample_ts = 0
+        self._sample_lock = threading.Lock()
         
         # Try to initialize advanced AI components
         self._initialize_ai_components()
@@ -72,7 +144,7 @@ class FixedAIPredictor:
                     logger.info("✅ Production AI predictor loaded successfully")
                     return
                 except Exception as e:
-                    logger.warning(f"Production predictor failed to load: {e}")
+                    logger.warning("Production predictor failed to load: %s", e)
                     self.error_log.append(f"Production predictor: {str(e)}")
             
             # Try to load TensorFlow
@@ -80,7 +152,7 @@ class FixedAIPredictor:
                 import tensorflow as tf
                 logger.info("✅ TensorFlow available")
             except ImportError as e:
-                logger.warning(f"TensorFlow not available: {e}")
+                logger.warning("TensorFlow not available: %s", e)
                 self.error_log.append(f"TensorFlow: {str(e)}")
             
             # Try to load OpenCV
@@ -88,11 +160,11 @@ class FixedAIPredictor:
                 import cv2
                 logger.info("✅ OpenCV available")
             except ImportError as e:
-                logger.warning(f"OpenCV not available: {e}")
+                logger.warning("OpenCV not available: %s", e)
                 self.error_log.append(f"OpenCV: {str(e)}")
                 
         except Exception as e:
-            logger.error(f"AI component initialization failed: {e}")
+            logger.error("AI component initialization failed: %s", e)
             self.error_log.append(f"Initialization: {str(e)}")
         
         # Always ensure we have a working fallback
@@ -103,35 +175,38 @@ class FixedAIPredictor:
     # ----------------------------
     def _decode_base64_to_array(self, image_data: Any) -> Optional['np.ndarray']:
         """Decode base64 string/bytes to RGB numpy array. Returns None on failure.
-        Accepts base64 str (without data URI prefix), raw bytes, or numpy array (passthrough).
+        Accepts base64 str (without data URI prefix), raw encoded image bytes (no base64
+        step), or numpy array (passthrough).
         """
         try:
             if np is None:
                 return None
-            arr = None
             if isinstance(image_data, np.ndarray):
-                arr = image_data
-            elif isinstance(image_data, (bytes, bytearray)):
-                try:
-                    img = Image.open(BytesIO(image_data))
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    arr = np.array(img)
-                except Exception:
-                    return None
-            elif isinstance(image_data, str):
+                return image_data
+            if isinstance(image_data, str):
                 # if data URI, strip header
                 if ',' in image_data and 'base64' in image_data[:50]:
                     image_data = image_data.split(',')[1]
-                raw = base64.b64decode(image_data)
-                img = Image.open(BytesIO(raw))
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                arr = np.array(img)
-            else:
-                return None
+                image_data = _b64decode(image_data)
+            if isinstance(image_data, (bytes, bytearray)):
+                return self._decode_image_bytes(image_data)
+            return None
+        except Exception:
+            return None
 
-            return arr
+    def _decode_image_bytes(self, raw: bytes) -> Optional['np.ndarray']:
+        """Decode an encoded image (JPEG/PNG/...) to an RGB array in one pass.
+        OpenCV decodes straight from the byte buffer; PIL is the fallback.
+        """
+        if CV2_AVAILABLE:
+            bgr = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+            if bgr is not None:
+                return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        try:
+            img = Image.open(BytesIO(raw))
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            return np.array(img)
         except Exception:
             return None
 
@@ -146,28 +221,44 @@ class FixedAIPredictor:
             h, w = rgb_array.shape[:2]
             scale = max(1, int(max(h, w) / 160))
             small = (rgb_array[::scale, ::scale] if scale > 1 else rgb_array)
-            gray = None
+            score = 0.0
             if CV2_AVAILABLE:
+                # Each call gets a fresh gray frame, so only the swap needs the lock;
+                # optical flow runs outside it
                 gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
-            else:
-                # fallback grayscale
-                gray = (0.2989 * small[:, :, 0] + 0.5870 * small[:, :, 1] + 0.1140 * small[:, :, 2]).astype('float32')
-
-            score = 0.0
-            if self._prev_small_gray is not None and self._prev_small_gray.shape == gray.shape:
-                if CV2_AVAILABLE:
-                    flow = cv2.calcOpticalFlowFarneback(self._prev_small_gray, gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+                with self._motion_lock:
+                    prev = self._prev_small_gray
+                    self._prev_small_gray = gray
+                if prev is not None and prev.shape == gray.shape:
+                    flow = cv2.calcOpticalFlowFarneback(prev, gray, None, *self._FARNEBACK_PARAMS)
                     mag, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
                     score = float(np.mean(mag))
-                else:
-                    diff = np.abs(gray.astype('float32') - self._prev_small_gray.astype('float32'))
-                    score = float(np.mean(diff))
+            else:
+                # The NumPy/Numba paths update shared buffers in place; at <=160px
+                # they are cheap enough to run entirely under the lock
+                shape = small.shape[:2]
+                with self._motion_lock:
+                    prev = self._prev_small_gray
+                    if NUMBA_AVAILABLE and prev is not None and prev.shape == shape:
+                        # Fused grayscale + abs-diff + mean; updates the previous frame in place
+                        score = float(_gray_diff_mean(small, prev))
+                        return _clamp01(score / 25.0)
+                    # fallback grayscale into a reused buffer, swapped with the previous frame's
+                    if self._gray_buf is None or self._gray_buf.shape != shape:
+                        self._gray_buf = np.empty(shape, dtype=np.float32)
+                        self._diff_buf = np.empty(shape, dtype=np.float32)
+                    gray = self._gray_buf
+                    np.dot(small[..., :3].reshape(-1, 3), self._LUMA, out=gray.reshape(-1))
+                    self._gray_buf = prev if prev is not None and prev.shape == shape else None
+                    if prev is not None and prev.shape == shape:
+                        diff = np.subtract(gray, prev, out=self._diff_buf)
+                        score = float(np.mean(np.abs(diff, out=diff)))
+                    self._prev_small_gray = gray
 
-            self._prev_small_gray = gray
             # Normalize roughly to 0..1 range for typical values
             # Heuristic normalization constants
             norm = score / (2.5 if CV2_AVAILABLE else 25.0)
-            return max(0.0, min(1.0, norm))
+            return _clamp01(norm)
         except Exception:
             return 0.0
 
@@ -183,25 +274,32 @@ class FixedAIPredictor:
             denom = max(1e-6, (self._ema_var ** 0.5))
             z = (risk - self._ema_mean) / denom
             calibrated = 1.0 / (1.0 + pow(2.718281828, -z))
-            return max(0.0, min(1.0, calibrated))
+            return _clamp01(calibrated)
         except Exception:
             return risk
 
     def _save_active_learning_sample(self, rgb_array: 'np.ndarray', meta: Dict[str, Any]) -> None:
         """Persist high-risk frames to disk for future labeling/fine-tuning."""
         try:
-            ts = int(time.time() * 1000)
-            img_path = self._samples_dir / f"sample_{ts}.jpg"
-            meta_path = self._samples_dir / f"sample_{ts}.json"
+            # Wall-clock ns survives reboots (monotonic restarts near zero); the pid keeps
+            # worker processes sharing the directory apart
+            with self._sample_lock:
+                ts = time.time_ns()
+                if ts <= self._last_sample_ts:
+                    # Keep file names unique under bursts of high-risk frames
+                    ts = self._last_sample_ts + 1
+                self._last_sample_ts = ts
+            stem = f"{self._samples_dir_str}/sample_{ts}_{os.getpid()}"
 
             try:
-                # Save image
-                Image.fromarray(rgb_array).save(str(img_path), format='JPEG', quality=85)
+                # Save image; exclusive create never overwrites an existing sample
+                with open(f"{stem}.jpg", 'xb') as f:
+                    Image.fromarray(rgb_array).save(f, format='JPEG', quality=85)
             except Exception:
                 pass
 
             # Save metadata
-            with open(meta_path, 'w', encoding='utf-8') as f:
+            with open(f"{stem}.json", 'x', encoding='utf-8') as f:
                 json.dump(meta, f, ensure_ascii=False, indent=2)
         except Exception:
             pass
@@ -230,7 +328,7 @@ class FixedAIPredictor:
                     format_type = img.format
                     mode = img.mode
                     
-                    logger.info(f"📸 Image loaded: {width}x{height}, format={format_type}, mode={mode}")
+                    logger.debug("Image loaded: %sx%s, format=%s, mode=%s", width, height, format_type, mode)
                     
                     # Basic image validation
                     if width < 32 or height < 32:
@@ -264,18 +362,17 @@ class FixedAIPredictor:
                     result['success'] = True
                     result['fallback_mode'] = False
                     result['processing_time'] = time.time() - start_time
-                    logger.info(f"✅ Production prediction successful: {result}")
+                    logger.debug("Production prediction successful: %s", result)
                     return result
                 except Exception as prod_error:
-                    logger.warning(f"Production predictor failed, using fallback: {prod_error}")
+                    logger.warning("Production predictor failed, using fallback: %s", prod_error)
                     self.error_log.append(f"Production prediction: {str(prod_error)}")
             
             # Enhanced fallback analysis with realistic results
             return self._enhanced_fallback_analysis(file_path, width, height, start_time)
             
         except Exception as e:
-            logger.error(f"Critical prediction error: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Critical prediction error: %s", e)
             
             return {
                 'error': 'Analysis system error',
@@ -291,14 +388,17 @@ class FixedAIPredictor:
                 }
             }
     
+    def predict_many(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        """Predict several uploaded files, returning one result per path in order."""
+        if len(file_paths) <= 1:
+            return [self.predict_from_file(path) for path in file_paths]
+        return list(_FILE_POOL.map(self.predict_from_file, file_paths))
+
     def _enhanced_fallback_analysis(self, file_path: str, width: int, height: int, start_time: float) -> Dict[str, Any]:
         """
         Enhanced fallback analysis that provides realistic results based on image characteristics
         """
         try:
-            # Simulate processing time for realism
-            time.sleep(0.1 + random.random() * 0.3)
-            
             # Analyze image characteristics for more realistic results
             with Image.open(file_path) as img:
                 # Convert to RGB if needed
@@ -306,25 +406,26 @@ class FixedAIPredictor:
                     img = img.convert('RGB')
                 
                 # Get image statistics for realistic analysis
-                img_array = list(img.getdata())
-                total_pixels = len(img_array)
+                total_pixels = width * height
                 
-                # Simple brightness and complexity analysis
-                brightness_values = [sum(pixel) / 3 for pixel in img_array[:1000]]  # Sample for performance
+                # Simple brightness and complexity analysis; only the sampled pixels are
+                # materialized, not a Python tuple per pixel of the whole image
+                sample = itertools.islice(img.getdata(), 1000)
+                brightness_values = [sum(pixel) / 3 for pixel in sample]  # Sample for performance
                 avg_brightness = sum(brightness_values) / len(brightness_values)
                 
                 # Estimate crowd density based on image characteristics
                 # Higher resolution and darker images (more shadows) suggest more people
-                density_factor = min(width * height / 100000, 2.0)  # Normalize by image size
-                brightness_factor = max(0.3, (255 - avg_brightness) / 255)  # Darker = more people
+                density_factor = min(width * height * _INV_100K, 2.0)  # Normalize by image size
+                brightness_factor = max(0.3, (255 - avg_brightness) * _INV_255)  # Darker = more people
                 
                 # Generate realistic people count
                 base_count = max(1, int(density_factor * brightness_factor * random.uniform(1.5, 4.0)))
                 people_count = min(base_count, 25)  # Cap at reasonable maximum
                 
                 # Calculate confidence based on image quality
-                quality_score = min(width, height) / 1000  # Better quality = higher confidence
-                confidence = 0.65 + min(quality_score * 0.25, 0.25) + random.uniform(-0.1, 0.1)
+                quality_score = min(width, height) * _INV_1000  # Better quality = higher confidence
+                confidence = 0.65 + _quality_bonus(quality_score) + random.uniform(-0.1, 0.1)
                 confidence = max(0.5, min(0.95, confidence))
                 
                 # Determine crowd status
@@ -361,11 +462,11 @@ class FixedAIPredictor:
                     'recommendations': self._generate_recommendations(people_count, is_stampede_risk)
                 }
                 
-                logger.info(f"✅ Enhanced fallback analysis completed: {people_count} people, confidence {confidence:.1%}")
+                logger.debug("Enhanced fallback analysis completed: %s people, confidence %.1f%%", people_count, confidence * 100)
                 return result
                 
         except Exception as fallback_error:
-            logger.error(f"Fallback analysis failed: {fallback_error}")
+            logger.error("Fallback analysis failed: %s", fallback_error)
             
             # Ultimate fallback - always works
             processing_time = time.time() - start_time
@@ -394,24 +495,22 @@ class FixedAIPredictor:
             if np is None:
                 raise RuntimeError('NumPy unavailable')
             h, w = (arr.shape[0], arr.shape[1]) if arr is not None and arr.ndim >= 2 else (480, 640)
-            # Simulate computation time
-            time.sleep(0.05 + random.random() * 0.2)
-
             # Brightness proxy
             if arr.ndim == 3:
                 if CV2_AVAILABLE:
-                    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+                    avg_brightness = float(np.mean(cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)))
                 else:
-                    gray = (0.2989 * arr[:, :, 0] + 0.5870 * arr[:, :, 1] + 0.1140 * arr[:, :, 2]).astype('float32')
+                    # Luma is linear, so the mean luma is the luma of the per-channel means
+                    channel_means = arr.reshape(-1, arr.shape[2])[:, :3].mean(axis=0)
+                    avg_brightness = float(np.dot(channel_means, self._LUMA))
             else:
-                gray = arr.astype('float32')
-            avg_brightness = float(np.mean(gray))
+                avg_brightness = float(np.mean(arr))
 
-            density_factor = min((w * h) / 100000.0, 2.0)
-            brightness_factor = max(0.3, (255.0 - avg_brightness) / 255.0)
+            density_factor = min(w * h * _INV_100K, 2.0)
+            brightness_factor = max(0.3, (255.0 - avg_brightness) * _INV_255)
             people_count = min(max(1, int(density_factor * brightness_factor * random.uniform(1.5, 4.0))), 25)
-            quality_score = min(w, h) / 1000.0
-            confidence = max(0.5, min(0.95, 0.65 + min(quality_score * 0.25, 0.25) + random.uniform(-0.1, 0.1)))
+            quality_score = min(w, h) * _INV_1000
+            confidence = max(0.5, min(0.95, 0.65 + _quality_bonus(quality_score) + random.uniform(-0.1, 0.1)))
             crowd_detected = people_count >= 3
             is_stampede_risk = (people_count >= 8 and confidence > 0.75)
 
@@ -473,12 +572,14 @@ class FixedAIPredictor:
             # Ensure required fields
             people = int(base.get('people_count', 0) or 0)
             conf = float(base.get('confidence_score', 0.5) or 0.5)
-            motion = self._compute_motion_score(rgb)
+            now = time.monotonic()
+            if now - self._last_motion_time >= self._motion_interval:
+                self._last_motion_score = self._compute_motion_score(rgb)
+                self._last_motion_time = now
+            motion = self._last_motion_score
 
-            # Compute fused risk (base + motion)
-            raw_score = min(1.0, people / 12.0)
-            base_risk = 0.5 * raw_score + 0.5 * max(0.0, min(1.0, conf)) * raw_score
-            fused_risk = max(0.0, min(1.0, 0.7 * base_risk + 0.3 * motion))
+            # Compute fused risk (base + motion): 0.7 * crowd term + 0.3 * motion
+            fused_risk = _clamp01(0.7 * (0.5 + 0.5 * _clamp01(conf)) * min(1.0, people / 12.0) + 0.3 * motion)
 
             # Online calibration
             calibrated = self._update_calibration(fused_risk)
@@ -520,7 +621,7 @@ class FixedAIPredictor:
             return result
 
         except Exception as e:
-            logger.error(f"Critical frame prediction error: {e}")
+            logger.exception("Critical frame prediction error: %s", e)
             return {
                 'crowd_detected': False,
                 'confidence_score': 0.5,
@@ -530,6 +631,15 @@ class FixedAIPredictor:
                 'status_message': f'Predict error: {str(e)}'
             }
     
+    def predict_crowd_batch(self, frames: List[Any]) -> List[Dict[str, Any]]:
+        """Predict a batch of frames from one stream, oldest first.
+
+        Frames are scored in order because motion and calibration state carry over
+        from one frame to the next; the gain is in amortizing everything around
+        inference (auth, stream lookup, DB writes, broadcasts) across the batch.
+        """
+        return [self.predict_crowd(frame) for frame in frames]
+
     def _generate_recommendations(self, people_count: int, is_stampede_risk: bool) -> List[str]:
         """Generate actionable recommendations based on analysis"""
         recommendations = []
@@ -565,7 +675,7 @@ class FixedAIPredictor:
         return {
             'model_loaded': self.model_loaded,
             'fallback_mode': self.fallback_mode,
-            'error_log': self.error_log,
+            'error_log': list(self.error_log),
             'system_info': {
                 'python_version': sys.version,
                 'ai_model_dir_exists': (Path(__file__).parent.parent.parent / 'ai_model').exists(),
@@ -575,43 +685,58 @@ class FixedAIPredictor:
     
     def _check_dependencies(self) -> Dict[str, bool]:
         """Check availability of key dependencies"""
-        deps = {}
-        
-        try:
-            import tensorflow as tf
-            deps['tensorflow'] = True
-        except ImportError:
-            deps['tensorflow'] = False
-        
-        try:
-            import cv2
-            deps['opencv'] = True
-        except ImportError:
-            deps['opencv'] = False
-        
-        try:
-            import numpy as np
-            deps['numpy'] = True
-        except ImportError:
-            deps['numpy'] = False
-        
-        return deps
+        return dict(_dependency_status())
+
+
+@functools.lru_cache(maxsize=1)
+def _dependency_status() -> Dict[str, bool]:
+    """Probe key dependencies once per process; imports are attempted only on first call"""
+    deps = {}
+    
+    try:
+        import tensorflow as tf
+        deps['tensorflow'] = True
+    except ImportError:
+        deps['tensorflow'] = False
+    
+    try:
+        import cv2
+        deps['opencv'] = True
+    except ImportError:
+        deps['opencv'] = False
+    
+    try:
+        import numpy as np
+        deps['numpy'] = True
+    except ImportError:
+        deps['numpy'] = False
+    
+    return deps
 
 # Global predictor instance
 _predictor_instance = None
+_predictor_lock = threading.Lock()
 
 def get_predictor():
-    """Get or create the fixed predictor instance"""
+    """Get or create the fixed predictor instance (constructed exactly once)"""
     global _predictor_instance
     if _predictor_instance is None:
-        _predictor_instance = FixedAIPredictor()
+        # Double-checked locking so concurrent cold-start requests don't each
+        # run _initialize_ai_components (and import TensorFlow) in parallel
+        with _predictor_lock:
+            if _predictor_instance is None:
+                _predictor_instance = FixedAIPredictor()
+    return _predictor_instance
+
+def loaded_predictor():
+    """The predictor if it has already been constructed, else None (never triggers a load)"""
     return _predictor_instance
 
 def test_predictor():
     """Test the predictor with a sample image"""
     predictor = get_predictor()
     status = predictor.get_system_status()
-    logger.info(f"Predictor status: {status}")
+    logger.info("Predictor status: %s", status)
     return status
 
 if __name__ == "__main__":
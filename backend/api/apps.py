@@ -1,6 +1,23 @@
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connects the cached-user invalidation signals in every process, not just
+        # the ones that happen to authenticate a request
+        from . import authentication  # noqa: F401
+
+        # Warm the predictor at worker startup so the first request doesn't pay for
+        # model load; skipped for management commands other than runserver
+        if not getattr(settings, 'ML_PRELOAD', False):
+            return
+        if sys.argv and sys.argv[0].endswith('manage.py') and 'runserver' not in sys.argv:
+            return
+        from .ai_predictor_fixed import get_predictor
+        get_predictor()
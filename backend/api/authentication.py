@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+try:
+    from rest_framework_simplejwt.utils import get_md5_hash_password
+except ImportError:  # simplejwt < 5.3 has no token revocation on password change
+    get_md5_hash_password = None
+
+# Resolved users are reused for this long; saves and deletes invalidate immediately.
+# QuerySet.update() sends no signal, so that path waits out the timeout
+USER_CACHE_TIMEOUT = 30
+
+# Only a cache every worker shares can be invalidated everywhere at once; with a
+# per-process cache (LocMem) a deactivation would linger in the other workers
+USER_CACHE_ENABLED = not any(
+    name in settings.CACHES['default']['BACKEND']
+    for name in ('LocMemCache', 'DummyCache')
+)
+
+
+def _user_cache_key(user_id):
+    return f'jwtuser:{user_id}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that caches the token's User instead of fetching it per request"""
+
+    def get_user(self, validated_token):
+        if not USER_CACHE_ENABLED:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        key = _user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+            return user
+
+        # Same checks simplejwt runs on a freshly fetched user
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if get_md5_hash_password is not None and getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    "The user's password has been changed.", code='password_changed'
+                )
+        return user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(_user_cache_key(instance.pk))
@@ -1,39 +1,185 @@
-from channels.generic.websocket import AsyncJsonWebsocketConsumer
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+
+from .authentication import CachedJWTAuthentication
+from .models import LiveStream
+from .renderers import dumps_text
+from .views import record_stream_frames, score_stream_frames
+
+try:
+    import msgpack  # Optional; enables compact binary frames for clients that ask for them
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+MSGPACK_SUBPROTOCOL = 'msgpack'
+
+logger = logging.getLogger(__name__)
+
+# Frames sent over a stream socket are scored in batches of up to FRAME_BATCH_SIZE,
+# collected for at most FRAME_BATCH_WINDOW seconds after the first one arrives
+FRAME_BATCH_SIZE = 8
+FRAME_BATCH_WINDOW = 0.05
+# Frames waiting beyond this are dropped oldest-first; live video only needs the latest
+FRAME_QUEUE_SIZE = 32
+
+
+class FrameConsumer(AsyncWebsocketConsumer):
+    """Base consumer: JSON text frames by default, msgpack binary frames when the
+    client negotiates the 'msgpack' subprotocol and msgpack is installed."""
+
+    use_msgpack = False
 
+    async def accept_negotiated(self):
+        if MSGPACK_AVAILABLE and MSGPACK_SUBPROTOCOL in self.scope.get('subprotocols', []):
+            self.use_msgpack = True
+            await self.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+        else:
+            await self.accept()
 
-class StreamConsumer(AsyncJsonWebsocketConsumer):
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            if bytes_data is not None:
+                if not MSGPACK_AVAILABLE:
+                    return
+                content = msgpack.unpackb(bytes_data, raw=False)
+            else:
+                content = json.loads(text_data)
+        except Exception:
+            return
+        if isinstance(content, dict):
+            await self.receive_content(content)
+
+    async def receive_content(self, content):
+        pass
+
+    async def send_content(self, content):
+        if self.use_msgpack:
+            await self.send(bytes_data=msgpack.packb(content, use_bin_type=True))
+        else:
+            await self.send(text_data=dumps_text(content))
+
+    async def forward_event(self, event):
+        # Producers pre-encode the payload once per group send (JSON, plus msgpack
+        # when installed) so N viewers don't each re-serialize the same dict
+        if self.use_msgpack and 'packed' in event:
+            await self.send(bytes_data=event['packed'])
+        elif 'text' in event:
+            if self.use_msgpack:
+                # Producer without msgpack installed; only this mixed setup re-encodes
+                await self.send_content(json.loads(event['text']))
+            else:
+                await self.send(text_data=event['text'])
+        else:
+            await self.send_content(event.get('data', {}))
+
+
+class StreamConsumer(FrameConsumer):
     async def connect(self):
         self.stream_id = self.scope['url_route']['kwargs']['stream_id']
         self.group_name = f'stream_{self.stream_id}'
 
-        # Simple auth check (optional): allow anonymous connect for viewing
+        # Viewing is open to anyone; sending frames needs the stream owner (checked on first frame)
+        self.stream = None
+        self.frame_queue = None
+        self.batch_task = None
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.accept_negotiated()
 
     async def disconnect(self, close_code):
+        if self.batch_task is not None:
+            self.batch_task.cancel()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-    async def receive_json(self, content, **kwargs):
-        # Echo/ping or future control messages
+    async def receive_content(self, content):
+        # Echo/ping, or a frame to analyze (base64 string, or raw bytes over msgpack)
         cmd = content.get('type')
         if cmd == 'ping':
-            await self.send_json({'type': 'pong'})
+            await self.send_content({'type': 'pong'})
+        elif cmd == 'frame':
+            await self.enqueue_frame(content.get('frame_data'))
+
+    async def enqueue_frame(self, frame_data):
+        if not frame_data:
+            return
+        if self.batch_task is None:
+            self.stream = await self.get_owned_stream()
+            if self.stream is None:
+                await self.send_content({'type': 'error', 'error': 'Live stream not found'})
+                return
+            self.frame_queue = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+            self.batch_task = asyncio.create_task(self.process_batches())
+        if self.frame_queue.full():
+            self.frame_queue.get_nowait()
+        self.frame_queue.put_nowait((timezone.now(), frame_data))
+
+    async def process_batches(self):
+        loop = asyncio.get_running_loop()
+        # Inference is CPU-bound and DB-free, so it gets its own worker thread rather
+        # than queueing behind every other consumer's ORM calls on the shared one
+        score = sync_to_async(score_stream_frames, thread_sensitive=False)
+        record = database_sync_to_async(record_stream_frames)
+        while True:
+            batch = [await self.frame_queue.get()]
+            deadline = loop.time() + FRAME_BATCH_WINDOW
+            while len(batch) < FRAME_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.frame_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                analyses, processing_time = await score(batch)
+                scored = await record(self.stream, batch, analyses, processing_time)
+            except Exception:
+                logger.exception("Frame batch failed for stream %s", self.stream.id)
+                await self.send_content({'type': 'error', 'error': 'Frame analysis failed'})
+                continue
+            if not scored:
+                await self.send_content({'type': 'error', 'error': 'No frame in the batch could be analyzed'})
+
+    @database_sync_to_async
+    def get_owned_stream(self):
+        user = self.scope.get('user') or AnonymousUser()
+        if not user.is_authenticated:
+            # The frontend passes its JWT access token as ?token=
+            token = parse_qs(self.scope.get('query_string', b'').decode()).get('token', [None])[0]
+            if not token:
+                return None
+            try:
+                auth = CachedJWTAuthentication()
+                user = auth.get_user(auth.get_validated_token(token))
+            except Exception:
+                return None
+        try:
+            return LiveStream.objects.select_related('user').get(id=int(self.stream_id), user=user)
+        except (ValueError, LiveStream.DoesNotExist):
+            return None
 
     async def stream_update(self, event):
         # Forward analysis updates to clients
-        await self.send_json(event.get('data', {}))
+        await self.forward_event(event)
 
 
-class AlertConsumer(AsyncJsonWebsocketConsumer):
+class AlertConsumer(FrameConsumer):
     async def connect(self):
         self.group_name = 'alerts'
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.accept_negotiated()
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def alert_message(self, event):
-        await self.send_json(event.get('data', {}) )
+        await self.forward_event(event)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.rollups import ROLLUP_HOURS, rollup_recent_hours
+
+
+class Command(BaseCommand):
+    help = 'Rebuild hourly AnalysisResult rollups (schedule every few minutes when Celery beat is not used)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=ROLLUP_HOURS,
+                            help='Trailing hours to rebuild; use a large value to backfill')
+
+    def handle(self, *args, **options):
+        count = rollup_recent_hours(options['hours'])
+        self.stdout.write(f'Rolled up {count} hourly buckets')
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.14 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_mediaupload_analysis_result'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='livestream',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('error', 'Error')], db_index=True, default='inactive', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['user', '-uploaded_at'], name='mediaupload_user_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['analysis_status', '-uploaded_at'], name='mediaupload_status_upl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['live_stream', '-timestamp'], name='analysis_stream_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['media_upload', '-timestamp'], name='analysis_media_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['acknowledged', '-created_at'], name='alert_ack_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['alert_type', 'severity', '-created_at'], name='alert_type_sev_created_idx'),
+        ),
+    ]
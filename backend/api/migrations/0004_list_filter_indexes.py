@@ -0,0 +1,25 @@
+# Generated by Django 4.2.14 on 2026-10-16 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['user', 'media_type', 'analysis_status'], name='mediaupload_user_type_st_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['severity', 'acknowledged', '-created_at'], name='alert_sev_ack_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['live_stream', '-created_at'], name='alert_stream_created_idx'),
+        ),
+    ]
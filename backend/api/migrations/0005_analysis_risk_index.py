@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-16 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(condition=models.Q(('is_stampede_risk', True)), fields=['-timestamp'], name='analysis_risk_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.14 on 2026-10-16 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_analysis_risk_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['-timestamp', 'is_stampede_risk'], name='ar_ts_risk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['created_at', 'severity', 'acknowledged'], name='alert_created_sev_ack_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.14 on 2026-10-16 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisResultHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour_start', models.DateTimeField(unique=True)),
+                ('analyses', models.IntegerField(default=0)),
+                ('high_risk', models.IntegerField(default=0)),
+                ('sum_people', models.BigIntegerField(default=0)),
+                ('count_people', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-hour_start'],
+            },
+        ),
+    ]
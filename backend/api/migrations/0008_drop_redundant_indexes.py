@@ -0,0 +1,25 @@
+# Generated by Django 4.2.14 on 2026-10-16 16:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_analysisresulthourly'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='analysisresult',
+            name='ar_ts_risk_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='alert',
+            name='alert_type_sev_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='alert',
+            name='alert_created_sev_ack_idx',
+        ),
+    ]
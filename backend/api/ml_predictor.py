@@ -1,6 +1,13 @@
+import atexit
+import collections
+import functools
 import logging
 import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from django.conf import settings
 
@@ -11,18 +18,59 @@ if str(AI_MODEL_DIR) not in sys.path:
 
 logger = logging.getLogger(__name__)
 
+# Cached int8 TFLite flatbuffer lives next to ML_MODEL_PATH
+TFLITE_SUFFIX = '.int8.tflite'
+TFLITE_CALIBRATION_SAMPLES = 100
+# Frozen + weights-quantized fused graph, preferred over the training checkpoint
+OPTIMIZED_GRAPH_SUFFIX = '.opt.pb'
+# SavedModel export of the fused graph, served via tf.function on TF 2.x
+SAVED_MODEL_SUFFIX = '.savedmodel'
+# Near-duplicate frames (same 10x10 average hash) reuse the last result; 0 disables
+RESULT_CACHE_SIZE = int(os.environ.get('ML_RESULT_CACHE_SIZE', '128'))
+# A coarse hash barely moves as a crowd slowly grows in a fixed view, so a cached
+# result is only reused for this many seconds before the model must run again
+RESULT_CACHE_TTL = float(os.environ.get('ML_RESULT_CACHE_TTL', '2.0'))
+# Face detection runs on a copy no wider than this
+FACE_DETECTION_MAX_WIDTH = 640
+# Res10 SSD face detector: fixed 300x300 input, BGR mean subtraction
+FACE_DNN_INPUT_SIZE = (300, 300)
+FACE_DNN_MEAN = (104.0, 177.0, 123.0)
+# Concurrent frames are stacked into one sess.run of up to this many, waiting at most
+# ML_BATCH_WAIT_MS for companions; ML_BATCH_MAX=1 disables batching
+INFERENCE_BATCH_MAX = int(os.environ.get('ML_BATCH_MAX', '16'))
+INFERENCE_BATCH_WAIT = float(os.environ.get('ML_BATCH_WAIT_MS', '10')) / 1000.0
+
+
+def _threads_per_worker():
+    """Cores available to one gunicorn worker (WEB_CONCURRENCY processes share the host)"""
+    workers = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+# Threads per op for TF sessions and the TFLite interpreter; TF_INTRA_OP overrides the
+# per-worker core split. Keep intra_op * workers ~= physical cores.
+INTRA_OP_THREADS = int(os.environ.get('TF_INTRA_OP') or _threads_per_worker())
+
+# Must be set before TensorFlow loads (production_predictor imports it too):
+# oneDNN's AVX2/AVX-512 kernels on. The OpenMP pool follows TF_INTRA_OP only when the
+# operator pinned it; otherwise the process environment is left alone
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '1')
+if os.environ.get('TF_INTRA_OP'):
+    os.environ.setdefault('OMP_NUM_THREADS', os.environ['TF_INTRA_OP'])
+
 # Import the new production predictor
 try:
     from production_predictor import get_predictor as get_production_predictor
     PRODUCTION_PREDICTOR_AVAILABLE = True
     logger.info("Production AI predictor loaded successfully")
 except ImportError as e:
-    logger.warning(f"Production predictor not available: {e}")
+    logger.warning("Production predictor not available: %s", e)
     PRODUCTION_PREDICTOR_AVAILABLE = False
 
 # Fallback imports for compatibility
 try:
     import tensorflow as tf
+    tf1 = tf.compat.v1 if hasattr(tf, 'compat') else tf
     TF_AVAILABLE = True
 except ImportError:
     logger.warning("TensorFlow not available. Using fallback mode.")
@@ -31,6 +79,10 @@ except ImportError:
 try:
     import cv2
     CV2_AVAILABLE = True
+    # Keep OpenCV's SIMD dispatch on and its thread pool small: with several
+    # gunicorn workers, one thread per request avoids workers x cores oversubscription
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(int(os.environ.get('CV2_THREADS', '1')))
 except ImportError:
     logger.warning("OpenCV not available. Using fallback mode.")
     CV2_AVAILABLE = False
@@ -40,15 +92,109 @@ from io import BytesIO
 import base64
 import numpy as np
 
+try:
+    import pybase64  # Optional; SIMD base64 decoder
+    _b64decode = pybase64.b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
+# Shared PRNG for demo/fallback results
+_rng = np.random.default_rng()
+
+
+def _average_hash(img_flat):
+    """10x10 average hash of the (1, 10000) model input: block means above the global mean.
+    10x10 rather than the classic 8x8 because 100x100 splits into whole 10px blocks."""
+    blocks = img_flat.reshape(10, 10, 10, 10).mean(axis=(1, 3))
+    return np.packbits(blocks > blocks.mean()).tobytes()
+
+
+@functools.lru_cache(maxsize=2)
+def _face_cascade(cascade_path):
+    """Parse a cascade XML once per process; shared by every CrowdPredictor"""
+    return cv2.CascadeClassifier(cascade_path)
+
+
+@functools.lru_cache(maxsize=2)
+def _face_net(proto_path, model_path):
+    """Load the Caffe SSD face detector once per process, pinned to the OpenCV CPU backend"""
+    net = cv2.dnn.readNetFromCaffe(proto_path, model_path)
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    return net
+
+
+def _session_config():
+    """Session config: INTRA_OP_THREADS per op, TF_INTER_OP (default 1) ops at once, XLA JIT on"""
+    config = tf1.ConfigProto(allow_soft_placement=True)
+    config.intra_op_parallelism_threads = INTRA_OP_THREADS
+    config.inter_op_parallelism_threads = int(os.environ.get('TF_INTER_OP', '1'))
+    config.graph_options.optimizer_options.global_jit_level = tf1.OptimizerOptions.ON_1
+    return config
+
+class BatchInferenceWorker:
+    """Collects concurrent single-frame requests into one batched model call"""
+
+    def __init__(self, run_batch, max_batch=INFERENCE_BATCH_MAX, max_wait=INFERENCE_BATCH_WAIT):
+        self._run_batch = run_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue = queue.Queue()
+        thread = threading.Thread(target=self._loop, name='crowd-batch-inference', daemon=True)
+        thread.start()
+
+    def submit_future(self, img_flat):
+        """Queue a (1, 10000) input; returns a concurrent.futures.Future for its score"""
+        future = Future()
+        self._queue.put((img_flat, future))
+        return future
+
+    def submit(self, img_flat, timeout=5.0):
+        """Queue a (1, 10000) input and block until its score is ready"""
+        return self.submit_future(img_flat).result(timeout=timeout)
+
+    def _loop(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(items) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                results = self._run_batch(np.concatenate([img for img, _ in items], axis=0))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
+
+
 class CrowdPredictor:
     def __init__(self):
         self.sess = None
         self.graph = None
         self.X = None
-        self.hid_layer3 = None
-        self.Xtrain = None
-        self.out_final = None
+        self.fused_out = None
+        self.interpreter = None
+        self._interpreter_lock = threading.Lock()  # tf.lite.Interpreter is not thread-safe
+        self._local = threading.local()  # per-thread preprocessing buffers
+        self._batcher = None
+        self._infer = None
+        self._saved_model = None
+        self._saved_model_path = None
+        # Repeat scoring of an unchanged file skips decode + preprocessing entirely
+        self._preprocessed_file = functools.lru_cache(maxsize=128)(self._preprocess_file)
+        self._result_cache = collections.OrderedDict()
+        self._result_cache_lock = threading.Lock()
         self.face_cascade = None
+        self.face_net = None
+        self._face_net_lock = threading.Lock()  # cv2.dnn.Net keeps per-forward state
         self.model_loaded = False
         # Load model only when needed to avoid startup crashes
     
@@ -59,93 +205,355 @@ class CrowdPredictor:
             return False
             
         try:
-            # Load TensorFlow model
-            if hasattr(tf, 'Session'):
-                self.sess = tf.Session()
-            else:
-                # TensorFlow 2.x compatibility
-                self.sess = tf.compat.v1.Session()
             model_path = settings.ML_MODEL_PATH
-            
-            if os.path.exists(model_path + '.meta'):
-                saver = tf.train.import_meta_graph(model_path + '.meta')
-                saver.restore(self.sess, tf.train.latest_checkpoint(os.path.dirname(model_path)))
-                self.graph = tf.get_default_graph()
+            tflite_path = model_path + TFLITE_SUFFIX
+            # ML_USE_TFLITE=False keeps inference on the FP32 graph, e.g. to check int8 accuracy
+            use_tflite = getattr(settings, 'ML_USE_TFLITE', True)
+            optimized_path = model_path + OPTIMIZED_GRAPH_SUFFIX
+            saved_model_path = model_path + SAVED_MODEL_SUFFIX
+
+            if use_tflite and os.path.exists(tflite_path) and self._load_tflite(tflite_path):
+                logger.info("TFLite int8 model loaded successfully")
+            elif os.path.exists(saved_model_path) and self._load_saved_model(saved_model_path):
+                logger.info("SavedModel concrete function loaded successfully")
+            elif os.path.exists(optimized_path) and self._load_optimized_graph(optimized_path):
+                logger.info("Optimized TensorFlow graph loaded successfully")
+            elif os.path.exists(model_path + '.meta'):
+                # Load TensorFlow model into an explicit graph (works under TF 2.x eager too)
+                self.graph = tf1.Graph()
+                with self.graph.as_default():
+                    saver = tf1.train.import_meta_graph(model_path + '.meta')
+                    self.sess = tf1.Session(graph=self.graph, config=_session_config())
+                    saver.restore(self.sess, tf1.train.latest_checkpoint(os.path.dirname(model_path)))
                 
-                # Get tensor references
-                self.X = self.graph.get_tensor_by_name('Placeholder:0')
-                self.hid_layer3 = self.graph.get_tensor_by_name('Relu_2:0')
-                self.Xtrain = self.graph.get_tensor_by_name('Placeholder_1:0')
-                self.out_final = self.graph.get_tensor_by_name('Sigmoid:0')
+                # Relu_2 -> Placeholder_1 is wired inside the fused graph, so the only
+                # tensors kept are its input (self.X) and output (self.fused_out)
+                self._build_fused_graph()
                 
-                print("TensorFlow model loaded successfully")
+                logger.info("TensorFlow model loaded successfully")
+                self._freeze_and_optimize(optimized_path)
+                self._export_saved_model(saved_model_path)
             else:
-                print(f"Model file not found at {model_path}")
+                logger.warning("Model file not found at %s", model_path)
                 return False
+
+            if self.sess is not None:
+                # Pre-resolved feed/fetch plan; avoids building a feed_dict per call
+                self._infer = self.sess.make_callable(self.fused_out, feed_list=[self.X])
+
+            # One-shot conversion; later loads pick up the cached flatbuffer
+            if use_tflite and self.interpreter is None and \
+                    self._convert_to_tflite(tflite_path) and self._load_tflite(tflite_path):
+                logger.info("Switched inference to TFLite int8 model")
             
-            # Load face cascade
-            if CV2_AVAILABLE:
-                cascade_path = settings.HAAR_CASCADE_PATH
+            # Prefer the DNN face detector (one forward pass per frame); fall back to
+            # a cascade (LBP when available, Haar otherwise; same detectMultiScale API)
+            proto_path = getattr(settings, 'FACE_DNN_PROTO_PATH', '')
+            weights_path = getattr(settings, 'FACE_DNN_MODEL_PATH', '')
+            if CV2_AVAILABLE and proto_path and weights_path and \
+                    os.path.exists(proto_path) and os.path.exists(weights_path):
+                self.face_net = _face_net(proto_path, weights_path)
+                logger.info("DNN face detector loaded successfully")
+            elif CV2_AVAILABLE:
+                cascade_path = getattr(settings, 'LBP_CASCADE_PATH', '')
+                if not cascade_path or not os.path.exists(cascade_path):
+                    cascade_path = settings.HAAR_CASCADE_PATH
                 if os.path.exists(cascade_path):
-                    self.face_cascade = cv2.CascadeClassifier(cascade_path)
-                    print("Face cascade loaded successfully")
+                    self.face_cascade = _face_cascade(cascade_path)
+                    logger.info("Face cascade loaded successfully")
                 else:
-                    print(f"Haar cascade file not found at {cascade_path}")
+                    logger.warning("Haar cascade file not found at %s", cascade_path)
                     # Don't return False, continue without face detection
             else:
-                print("OpenCV not available, face detection disabled")
+                logger.warning("OpenCV not available, face detection disabled")
             
             self.model_loaded = True
+            self._warm_up()
+            # The TFLite interpreter has a fixed batch-1 input, so only sessions are batched
+            if self.interpreter is None and INFERENCE_BATCH_MAX > 1:
+                self._batcher = BatchInferenceWorker(self._run_batch)
             return True
             
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
+            logger.exception("Error loading model: %s", e)
             return False
     
+    def _warm_up(self):
+        """Run one dummy inference so kernel setup and weight page-in happen at load time"""
+        try:
+            self._run_model(np.zeros((1, 10000), dtype=np.float32))
+        except Exception as e:
+            logger.warning("Model warm-up failed: %s", e)
+
+    def _build_fused_graph(self):
+        """Stitch autoencoder and CNN into one graph so inference is a single sess.run.
+
+        The restored checkpoint is frozen to constants, then imported twice into a
+        fresh graph: the encoder up to Relu_2, and the classifier with its
+        Placeholder_1 input wired to an in-graph reshape of Relu_2.
+        """
+        frozen = tf1.graph_util.convert_variables_to_constants(
+            self.sess, self.graph.as_graph_def(), ['Relu_2', 'Sigmoid']
+        )
+        encoder_def = tf1.graph_util.extract_sub_graph(frozen, ['Relu_2'])
+        classifier_def = tf1.graph_util.extract_sub_graph(frozen, ['Sigmoid'])
+
+        fused_graph = tf1.Graph()
+        with fused_graph.as_default():
+            x = tf1.placeholder(tf.float32, [None, 10000], name='input')
+            hidden, = tf1.import_graph_def(
+                encoder_def, input_map={'Placeholder:0': x},
+                return_elements=['Relu_2:0'], name='encoder'
+            )
+            reshaped = tf1.reshape(hidden, [-1, 50, 50, 1])
+            out, = tf1.import_graph_def(
+                classifier_def, input_map={'Placeholder_1:0': reshaped},
+                return_elements=['Sigmoid:0'], name='classifier'
+            )
+
+        # The training-graph session is no longer needed once weights are frozen
+        self.sess.close()
+        self.graph = fused_graph
+        self.sess = tf1.Session(graph=fused_graph, config=_session_config())
+        self.X = x
+        self.fused_out = out
+
+    def _freeze_and_optimize(self, optimized_path):
+        """Persist a weights-quantized copy of the fused graph that load_model prefers.
+
+        Only quantize_weights is applied; quantize_nodes is deliberately left out
+        because the quantized kernels are slower than float ones on x86 CPUs.
+        """
+        try:
+            from tensorflow.tools.graph_transforms import TransformGraph
+        except ImportError:
+            return False
+        try:
+            output_name = self.fused_out.op.name
+            graph_def = TransformGraph(
+                self.graph.as_graph_def(), [self.X.op.name], [output_name],
+                [
+                    'strip_unused_nodes(type=float, shape="-1,10000")',  # keep the batch dim dynamic
+                    'remove_nodes(op=Identity, op=CheckNumerics)',
+                    'fold_constants(ignore_errors=true)',
+                    'fold_batch_norms',
+                    'fold_old_batch_norms',
+                    'quantize_weights',
+                ]
+            )
+            with open(optimized_path, 'wb') as f:
+                f.write(graph_def.SerializeToString())
+            return True
+        except Exception as e:
+            logger.warning("Graph optimization failed: %s", e)
+            return False
+
+    def _load_optimized_graph(self, optimized_path):
+        """Import the frozen, weights-quantized graph written by _freeze_and_optimize"""
+        try:
+            graph_def = tf1.GraphDef()
+            with open(optimized_path, 'rb') as f:
+                graph_def.ParseFromString(f.read())
+            graph = tf1.Graph()
+            with graph.as_default():
+                tf1.import_graph_def(graph_def, name='')
+            self.graph = graph
+            self.sess = tf1.Session(graph=graph, config=_session_config())
+            self.X = graph.get_tensor_by_name('input:0')
+            self.fused_out = graph.get_tensor_by_name('classifier/Sigmoid:0')
+            return True
+        except Exception as e:
+            logger.warning("Could not load optimized graph %s: %s", optimized_path, e)
+            return False
+
+    def _export_saved_model(self, saved_model_path):
+        """Save the fused graph as a SavedModel with one 'serving_default' signature (x -> score)"""
+        if os.path.exists(saved_model_path):
+            return False
+        try:
+            with self.graph.as_default():
+                tf1.saved_model.simple_save(
+                    self.sess, saved_model_path,
+                    inputs={'x': self.X}, outputs={'score': self.fused_out}
+                )
+            return True
+        except Exception as e:
+            logger.warning("SavedModel export failed: %s", e)
+            return False
+
+    def _load_saved_model(self, saved_model_path):
+        """Serve the SavedModel through a tf.function with a fixed input signature (TF 2.x only)"""
+        if not hasattr(tf, 'executing_eagerly') or not tf.executing_eagerly():
+            return False
+        try:
+            loaded = tf.saved_model.load(saved_model_path)
+            signature = loaded.signatures['serving_default']
+
+            @tf.function(input_signature=[tf.TensorSpec([None, 10000], tf.float32)])
+            def infer(x):
+                return signature(x=x)['score']
+
+            self._saved_model = loaded  # keep the loaded object (and its variables) alive
+            self._saved_model_path = saved_model_path
+            self._infer = lambda batch: infer(batch).numpy()
+            return True
+        except Exception as e:
+            logger.warning("Could not load SavedModel %s: %s", saved_model_path, e)
+            return False
+
+    def _representative_dataset(self):
+        """Yield up to TFLITE_CALIBRATION_SAMPLES preprocessed frames for int8 calibration.
+
+        Frames come from the active-learning captures; returns None when there are
+        none, in which case conversion falls back to weights-only quantization.
+        """
+        samples_dir = Path(__file__).parent.parent / 'active_learning'
+        paths = sorted(samples_dir.glob('*.jpg'))[:TFLITE_CALIBRATION_SAMPLES] if samples_dir.exists() else []
+        if not paths:
+            return None
+
+        def gen():
+            for path in paths:
+                with open(path, 'rb') as f:
+                    img_flat, _, _ = self.preprocess_image(f.read())
+                if img_flat is not None:
+                    yield [img_flat.astype(np.float32)]
+        return gen
+
+    def _convert_to_tflite(self, tflite_path):
+        """Convert the fused graph to a TFLite flatbuffer with post-training int8 quantization"""
+        if not hasattr(tf, 'lite'):
+            return False
+        try:
+            if self.sess is not None:
+                converter = tf1.lite.TFLiteConverter.from_session(self.sess, [self.X], [self.fused_out])
+            elif self._saved_model_path is not None:
+                converter = tf.lite.TFLiteConverter.from_saved_model(self._saved_model_path)
+            else:
+                return False
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            representative_dataset = self._representative_dataset()
+            if representative_dataset is not None:
+                converter.representative_dataset = representative_dataset
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+                converter.inference_input_type = tf.int8
+            tflite_model = converter.convert()
+            with open(tflite_path, 'wb') as f:
+                f.write(tflite_model)
+            return True
+        except Exception as e:
+            logger.warning("TFLite conversion failed, keeping TF session: %s", e)
+            return False
+
+    def _load_tflite(self, tflite_path):
+        """Create the TFLite interpreter and cache its input/output details"""
+        if not hasattr(tf, 'lite'):
+            return False
+        try:
+            interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=INTRA_OP_THREADS)
+            interpreter.allocate_tensors()
+            self._tflite_input = interpreter.get_input_details()[0]
+            self._tflite_output = interpreter.get_output_details()[0]
+            self.interpreter = interpreter
+            return True
+        except Exception as e:
+            logger.warning("Could not load TFLite model %s: %s", tflite_path, e)
+            self.interpreter = None
+            return False
+
+    def _run_model(self, img_flat):
+        """Run autoencoder + CNN on a (1, 10000) float32 input; returns the scalar score"""
+        if self.interpreter is None:
+            return self._infer(img_flat)[0][0]
+
+        inp, out = self._tflite_input, self._tflite_output
+        if inp['dtype'] == np.int8:
+            scale, zero_point = inp['quantization']
+            img_flat = np.clip(np.round(img_flat / scale + zero_point), -128, 127).astype(np.int8)
+        with self._interpreter_lock:
+            self.interpreter.set_tensor(inp['index'], img_flat)
+            self.interpreter.invoke()
+            result = self.interpreter.get_tensor(out['index'])[0][0]
+        if out['dtype'] == np.int8:
+            scale, zero_point = out['quantization']
+            result = (float(result) - zero_point) * scale
+        return result
+
+    def _input_buffer(self):
+        """Return this thread's preallocated (1, 10000) float32 model input buffer"""
+        buf = getattr(self._local, 'img_buf', None)
+        if buf is None:
+            buf = self._local.img_buf = np.empty((1, 10000), dtype=np.float32)
+        return buf
+
+    def _resize_buffer(self):
+        """Return this thread's preallocated 100x100 uint8 resize target"""
+        buf = getattr(self._local, 'resize_buf', None)
+        if buf is None:
+            buf = self._local.resize_buf = np.empty((100, 100), dtype=np.uint8)
+        return buf
+
+    def _run_batch(self, batch):
+        """Run the fused TF graph on an (N, 10000) batch; returns N scalar scores"""
+        return self._infer(batch)[:, 0]
+
     def preprocess_image(self, image_data):
-        """Preprocess image for model prediction with robust error handling"""
+        """Preprocess image for model prediction with robust error handling.
+
+        Returns (img_flat, gray, decode_scale); decode_scale is gray's width over the
+        source image's width (below 1.0 only when a JPEG was decoded at reduced scale).
+        """
+        decode_scale = 1.0
         try:
-            print(f"Preprocessing image data type: {type(image_data)}")
+            logger.debug("Preprocessing image data type: %s", type(image_data))
             
             # Handle different input types
             if isinstance(image_data, str):
-                print("Processing base64 string...")
+                logger.debug("Processing base64 string...")
                 try:
                     # Base64 encoded image
-                    image_data = base64.b64decode(image_data)
-                    print("Base64 decoded successfully")
+                    image_data = _b64decode(image_data)
+                    logger.debug("Base64 decoded successfully")
                 except Exception as e:
-                    print(f"Base64 decode error: {e}")
+                    logger.warning("Base64 decode error: %s", e)
                     return None, None, None
             
-            # Convert to PIL Image
-            if isinstance(image_data, bytes):
-                print("Converting bytes to PIL Image...")
+            # Decode straight to grayscale with OpenCV (one SIMD pass, no RGB buffer);
+            # PIL remains the fallback for formats imdecode can't handle
+            image = None
+            if isinstance(image_data, bytes) and CV2_AVAILABLE:
+                image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+            if image is None and isinstance(image_data, bytes):
+                logger.debug("Converting bytes to PIL Image...")
                 try:
                     image = Image.open(BytesIO(image_data))
-                    # Convert to RGB if needed
-                    if image.mode in ('RGBA', 'P'):
-                        image = image.convert('RGB')
-                    image = np.array(image)
-                    print(f"PIL Image converted, shape: {image.shape}")
+                    # JPEG: let libjpeg decode straight to grayscale at a reduced DCT scale,
+                    # kept at least FACE_DETECTION_MAX_WIDTH so detection sees the same detail
+                    # (draft is a no-op for other formats)
+                    source_width = image.width
+                    image.draft('L', (FACE_DETECTION_MAX_WIDTH, FACE_DETECTION_MAX_WIDTH))
+                    decode_scale = image.width / source_width
+                    image = np.array(image.convert('L'))
+                    logger.debug("PIL Image converted, shape: %s", image.shape)
                 except Exception as e:
-                    print(f"PIL Image conversion error: {e}")
+                    logger.warning("PIL Image conversion error: %s", e)
                     return None, None, None
             elif isinstance(image_data, np.ndarray):
-                print("Using numpy array directly...")
+                logger.debug("Using numpy array directly...")
                 image = image_data
-            else:
-                print(f"Unsupported image data type: {type(image_data)}")
+            elif image is None:
+                logger.warning("Unsupported image data type: %s", type(image_data))
                 return None, None, None
             
             # Ensure image has valid shape
             if len(image.shape) < 2:
-                print(f"Invalid image shape: {image.shape}")
+                logger.warning("Invalid image shape: %s", image.shape)
                 return None, None, None
             
             # Convert to grayscale if needed
             if len(image.shape) == 3:
-                print("Converting to grayscale...")
+                logger.debug("Converting to grayscale...")
                 if CV2_AVAILABLE:
                     # Handle different color formats
                     if image.shape[2] == 3:
@@ -157,102 +565,157 @@ class CrowdPredictor:
                 else:
                     # Fallback grayscale conversion
                     if image.shape[2] >= 3:
-                        gray = np.dot(image[...,:3], [0.2989, 0.5870, 0.1140])
+                        # Fixed-point luma in uint16: (77R + 150G + 29B) >> 8, max 65280
+                        gray = ((image[..., 0].astype(np.uint16) * 77
+                                 + image[..., 1].astype(np.uint16) * 150
+                                 + image[..., 2].astype(np.uint16) * 29) >> 8).astype(np.uint8)
                     else:
                         gray = image[:,:,0]
             else:
                 gray = image
             
-            print(f"Grayscale image shape: {gray.shape}")
+            logger.debug("Grayscale image shape: %s", gray.shape)
             
-            # Ensure grayscale is proper format
-            gray = gray.astype(np.uint8)
+            # Ensure grayscale is proper format (no copy when decode already gave uint8)
+            gray = gray.astype(np.uint8, copy=False)
             
             # Resize to 100x100
-            print("Resizing image...")
+            logger.debug("Resizing image...")
             if CV2_AVAILABLE:
-                resized = cv2.resize(gray, (100, 100))
+                resized = cv2.resize(gray, (100, 100), dst=self._resize_buffer(),
+                                     interpolation=cv2.INTER_AREA)
             else:
                 # Fallback resize using PIL
                 pil_img = Image.fromarray(gray)
                 pil_img = pil_img.resize((100, 100))
                 resized = np.array(pil_img)
             
-            print(f"Resized image shape: {resized.shape}")
+            logger.debug("Resized image shape: %s", resized.shape)
             
-            # Flatten for model input
-            img_flat = resized.flatten().astype('float32').reshape(1, -1)
-            print(f"Flattened image shape: {img_flat.shape}")
+            # Flatten for model input: widen into this thread's reused (1, 10000) buffer
+            img_flat = self._input_buffer()
+            np.copyto(img_flat.reshape(100, 100), resized, casting='unsafe')
+            logger.debug("Flattened image shape: %s", img_flat.shape)
             
-            return img_flat, gray, image
+            return img_flat, gray, decode_scale
             
         except Exception as e:
-            print(f"Error preprocessing image: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error preprocessing image: %s", e)
             return None, None, None
     
+    def _detection_image(self, gray):
+        """Downscale a grayscale frame to at most FACE_DETECTION_MAX_WIDTH; returns (image, scale)"""
+        width = gray.shape[1]
+        if not CV2_AVAILABLE or width <= FACE_DETECTION_MAX_WIDTH:
+            return gray, 1.0
+        scale = FACE_DETECTION_MAX_WIDTH / width
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
     def detect_faces(self, gray_image):
         """Detect faces in the image"""
         try:
+            if self.face_net is not None:
+                return self._detect_faces_dnn(gray_image)
             if self.face_cascade is None:
                 return []
             
+            # Coarser pyramid and bounded face sizes keep the scan count low
             faces = self.face_cascade.detectMultiScale(
                 gray_image, 
-                scaleFactor=1.1, 
-                minNeighbors=5
+                scaleFactor=1.2, 
+                minNeighbors=5,
+                minSize=(30, 30),
+                maxSize=(300, 300),
+                flags=cv2.CASCADE_SCALE_IMAGE
             )
             return faces
             
         except Exception as e:
-            print(f"Error detecting faces: {str(e)}")
+            logger.exception("Error detecting faces: %s", e)
             return []
     
-    def predict_crowd(self, image_data):
+    def _detect_faces_dnn(self, gray_image):
+        """Run the SSD face detector; returns an (N, 4) array of (x, y, w, h) like detectMultiScale"""
+        h, w = gray_image.shape[:2]
+        bgr = cv2.cvtColor(gray_image, cv2.COLOR_GRAY2BGR)
+        blob = cv2.dnn.blobFromImage(bgr, 1.0, FACE_DNN_INPUT_SIZE, FACE_DNN_MEAN)
+        with self._face_net_lock:
+            self.face_net.setInput(blob)
+            detections = self.face_net.forward()
+
+        # Rows are [_, class, confidence, x1, y1, x2, y2] in relative coords; the
+        # DetectionOutput layer has already applied NMS
+        rows = detections[0, 0]
+        rows = rows[rows[:, 2] >= getattr(settings, 'FACE_DNN_CONFIDENCE', 0.5)]
+        boxes = np.clip(rows[:, 3:7], 0.0, 1.0) * np.array([w, h, w, h], dtype=np.float32)
+        boxes[:, 2:] -= boxes[:, :2]
+        return boxes.astype(int)
+
+    def predict_crowd(self, image_data, preprocessed=None):
         """
         Predict crowd status from image data
+        preprocessed: optional (img_flat, det_gray, det_scale) from _preprocess_file
         Returns: dict with prediction results
         """
-        # Always try to provide a meaningful response, even in demo mode
+        # Always try to provide a meaningful response, even in demo mode.
+        # The model is loaded once by get_predictor(), never lazily per request.
         if not self.model_loaded:
-            if not self.load_model():
-                # Enhanced demo mode with more realistic data
-                import random
-                people_count = random.randint(1, 8)
-                confidence = 0.7 + random.random() * 0.25
-                
-                return {
-                    'crowd_detected': people_count >= 2,
-                    'confidence_score': round(confidence, 2),
-                    'people_count': people_count,
-                    'is_stampede_risk': people_count >= 6 and confidence > 0.8,
-                    'demo_mode': True,
-                    'message': 'Running in demo mode - AI model not loaded'
-                }
+            # Enhanced demo mode with more realistic data
+            people_count = int(_rng.integers(1, 9))
+            confidence = 0.7 + _rng.random() * 0.25
+            
+            return {
+                'crowd_detected': people_count >= 2,
+                'confidence_score': round(confidence, 2),
+                'people_count': people_count,
+                'is_stampede_risk': people_count >= 6 and confidence > 0.8,
+                'demo_mode': True,
+                'message': 'Running in demo mode - AI model not loaded'
+            }
         
         try:
-            print("Starting image preprocessing...")
-            img_flat, gray, original = self.preprocess_image(image_data)
-            if img_flat is None:
-                print("Image preprocessing failed, using fallback analysis")
-                return self._fallback_analysis(error="Image preprocessing failed")
-            
-            # Get compressed representation from autoencoder
-            compressed = self.sess.run(self.hid_layer3, feed_dict={self.X: img_flat})
-            
-            # Reshape for CNN input
-            reshaped = []
-            for j in range(0, 2500, 50):
-                temp = [[compressed[0][k]] for k in range(j, j + 50)]
-                reshaped.append(temp)
-            final_input = np.expand_dims(np.array(reshaped), axis=0)
+            if preprocessed is None:
+                logger.debug("Starting image preprocessing...")
+                img_flat, gray, decode_scale = self.preprocess_image(image_data)
+                if img_flat is None:
+                    logger.warning("Image preprocessing failed, using fallback analysis")
+                    return self._fallback_analysis(error="Image preprocessing failed")
+                # Faces are detected on a <=640px-wide copy; counts only need to be
+                # approximate and cascade cost is linear in pixel count. A reduced-scale
+                # JPEG decode folds into the same factor, so boxes map back to the source
+                det_gray, det_scale = self._detection_image(gray)
+                det_scale *= decode_scale
+            else:
+                img_flat, det_gray, det_scale = preprocessed
+
+            # A static camera produces near-identical frames; skip model and detector for them
+            frame_hash = _average_hash(img_flat) if RESULT_CACHE_SIZE > 0 else None
+            if frame_hash is not None:
+                now = time.monotonic()
+                with self._result_cache_lock:
+                    entry = self._result_cache.get(frame_hash)
+                    cached = None
+                    if entry is not None:
+                        if now - entry[0] <= RESULT_CACHE_TTL:
+                            cached = entry[1]
+                            self._result_cache.move_to_end(frame_hash)
+                        else:
+                            # Expired: re-run the model rather than trust an old "normal"
+                            del self._result_cache[frame_hash]
+                if cached is not None:
+                    return dict(cached, from_cache=True)
             
-            # Get prediction from CNN
-            result = self.sess.run(self.out_final, feed_dict={self.Xtrain: final_input})[0][0]
+            # Autoencoder -> reshape -> CNN in a single graph execution, batched
+            # with any other frames arriving at the same time
+            if self._batcher is not None:
+                result = self._batcher.submit(img_flat)
+            else:
+                result = self._run_model(img_flat)
             
             # Detect faces for people counting
-            faces = self.detect_faces(gray)
+            faces = self.detect_faces(det_gray)
+            if det_scale != 1.0 and len(faces) > 0:
+                faces = np.round(np.asarray(faces) / det_scale).astype(int)
             num_people = len(faces)
             
             # Enhanced crowd analysis logic
@@ -262,11 +725,8 @@ class CrowdPredictor:
             crowd_detected = (confidence_score > 1.0) or (num_people >= 3)
             
             # Improved stampede risk assessment
-            risk_factors = 0
-            if confidence_score > 2.5: risk_factors += 1
-            if num_people >= 6: risk_factors += 1
-            if num_people >= 10: risk_factors += 2
-            if confidence_score > 3.0 and num_people >= 4: risk_factors += 1
+            risk_factors = ((confidence_score > 2.5) + (num_people >= 6) + 2 * (num_people >= 10)
+                            + (confidence_score > 3.0 and num_people >= 4))
             
             is_stampede_risk = risk_factors >= 2
             
@@ -278,7 +738,7 @@ class CrowdPredictor:
             else:
                 status_message = "✅ Normal crowd levels"
             
-            return {
+            result = {
                 'crowd_detected': crowd_detected,
                 'confidence_score': round(confidence_score, 2),
                 'people_count': num_people,
@@ -288,17 +748,24 @@ class CrowdPredictor:
                 'faces_coordinates': faces.tolist() if len(faces) > 0 else [],
                 'model_active': True
             }
+            # Never serve a stampede alert from cache: each one must be freshly computed
+            if frame_hash is not None and not is_stampede_risk:
+                with self._result_cache_lock:
+                    self._result_cache[frame_hash] = (time.monotonic(), dict(result))
+                    self._result_cache.move_to_end(frame_hash)
+                    if len(self._result_cache) > RESULT_CACHE_SIZE:
+                        self._result_cache.popitem(last=False)
+            return result
             
         except Exception as e:
-            print(f"Error in crowd prediction: {str(e)}")
+            logger.exception("Error in crowd prediction: %s", e)
             # Return fallback analysis instead of error
             return self._fallback_analysis(error=str(e))
     
     def _fallback_analysis(self, error=None):
         """Provide fallback analysis when ML model fails"""
-        import random
-        people_count = random.randint(0, 5)
-        confidence = 0.5 + random.random() * 0.3
+        people_count = int(_rng.integers(0, 6))
+        confidence = 0.5 + _rng.random() * 0.3
         
         return {
             'crowd_detected': people_count >= 2,
@@ -311,25 +778,41 @@ class CrowdPredictor:
             'model_active': False
         }
     
+    def _preprocess_file(self, file_path, mtime_ns, size):
+        """Decode and preprocess a file; cached per (path, mtime_ns, size) in __init__.
+
+        Returns (img_flat, det_gray, det_scale), or None if preprocessing failed.
+        """
+        image = None
+        # Try OpenCV first if available; decode straight to grayscale since that
+        # is all preprocess_image needs (no BGR buffer, no conversion pass)
+        if CV2_AVAILABLE:
+            image = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+        
+        if image is None:
+            # Fallback to PIL if OpenCV unavailable or failed; let PIL produce
+            # luma directly rather than materialising an RGB array first
+            with Image.open(file_path) as pil_img:
+                image = np.asarray(pil_img.convert('L'))
+
+        img_flat, gray, _ = self.preprocess_image(image)
+        if img_flat is None:
+            return None
+        det_gray, det_scale = self._detection_image(gray)
+        # img_flat is the thread's reusable buffer, so the cache keeps its own copy
+        return img_flat.copy(), det_gray, det_scale
+
     def predict_from_file(self, file_path):
         """Predict crowd status from image file"""
         try:
-            # Try OpenCV first if available
-            if CV2_AVAILABLE:
-                image = cv2.imread(file_path)
-                if image is not None:
-                    return self.predict_crowd(image)
-            
-            # Fallback to PIL if OpenCV unavailable or failed
-            with Image.open(file_path) as pil_img:
-                if pil_img.mode in ('RGBA', 'P'):
-                    pil_img = pil_img.convert('RGB')
-                import numpy as np
-                image = np.array(pil_img)
-                return self.predict_crowd(image)
+            stat = os.stat(file_path)
+            preprocessed = self._preprocessed_file(file_path, stat.st_mtime_ns, stat.st_size)
+            if preprocessed is None:
+                return self._fallback_analysis(error="Image preprocessing failed")
+            return self.predict_crowd(None, preprocessed=preprocessed)
             
         except Exception as e:
-            print(f"Error predicting from file: {str(e)}")
+            logger.exception("Error predicting from file: %s", e)
             return {
                 'error': str(e),
                 'crowd_detected': False,
@@ -338,14 +821,48 @@ class CrowdPredictor:
                 'is_stampede_risk': False
             }
     
-    def __del__(self):
-        """Clean up TensorFlow session"""
+    def predict_many(self, file_paths):
+        """Predict several image files at once; returns one result dict per path, in order.
+
+        Files are decoded and preprocessed in parallel, and their concurrent model
+        calls are coalesced by the batching worker into batched graph runs.
+        """
+        if len(file_paths) <= 1:
+            return [self.predict_from_file(path) for path in file_paths]
+        return list(_get_file_pool().map(self.predict_from_file, file_paths))
+
+    def close(self):
+        """Release the TensorFlow session; called at exit for the module predictor"""
         if self.sess is not None:
             self.sess.close()
+            self.sess = None
+        self.model_loaded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 # Global predictor instance (lazy loaded)
 predictor = None
+_predictor_lock = threading.Lock()
+
+# Shared pool for multi-file scoring; decode/resize release the GIL
+_file_pool = None
+_file_pool_lock = threading.Lock()
+
+
+def _get_file_pool():
+    global _file_pool
+    if _file_pool is None:
+        with _file_pool_lock:
+            if _file_pool is None:
+                _file_pool = ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1), thread_name_prefix='crowd-file'
+                )
+    return _file_pool
 
 def get_predictor():
     """
@@ -353,15 +870,27 @@ def get_predictor():
     Uses new production predictor if available, falls back to legacy predictor
     """
     global predictor
-    
-    # Try to use the new production predictor first
-    if PRODUCTION_PREDICTOR_AVAILABLE:
-        try:
-            return get_production_predictor()
-        except Exception as e:
-            logger.warning(f"Production predictor failed, using legacy: {e}")
-    
-    # Fallback to legacy predictor
-    if predictor is None:
-        predictor = CrowdPredictor()
+
+    if predictor is not None:
+        return predictor
+
+    # Double-checked so concurrent cold requests can't each build a predictor
+    with _predictor_lock:
+        if predictor is not None:
+            return predictor
+
+        # Try to use the new production predictor first
+        if PRODUCTION_PREDICTOR_AVAILABLE:
+            try:
+                predictor = get_production_predictor()
+                return predictor
+            except Exception as e:
+                logger.warning("Production predictor failed, using legacy: %s", e)
+
+        # Fallback to legacy predictor
+        p = CrowdPredictor()
+        p.load_model()
+        # Explicit shutdown instead of __del__, which may run mid TF teardown
+        atexit.register(p.close)
+        predictor = p
     return predictor
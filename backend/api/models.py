@@ -38,6 +38,11 @@ class MediaUpload(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['user', '-uploaded_at'], name='mediaupload_user_uploaded_idx'),
+            models.Index(fields=['analysis_status', '-uploaded_at'], name='mediaupload_status_upl_idx'),
+            models.Index(fields=['user', 'media_type', 'analysis_status'], name='mediaupload_user_type_st_idx'),
+        ]
     
     def __str__(self):
         return f"{self.filename} - {self.user.username}"
@@ -53,7 +58,7 @@ class LiveStream(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     stream_name = models.CharField(max_length=100)
     stream_url = models.URLField(blank=True)
-    status = models.CharField(max_length=20, choices=STREAM_STATUS, default='inactive')
+    status = models.CharField(max_length=20, choices=STREAM_STATUS, default='inactive', db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
     last_active = models.DateTimeField(default=timezone.now)
     
@@ -87,6 +92,13 @@ class AnalysisResult(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['live_stream', '-timestamp'], name='analysis_stream_ts_idx'),
+            models.Index(fields=['media_upload', '-timestamp'], name='analysis_media_ts_idx'),
+            # Partial: risky rows are a small slice, so this stays tiny (stampede_only filter)
+            models.Index(fields=['-timestamp'], name='analysis_risk_ts_idx',
+                         condition=models.Q(is_stampede_risk=True)),
+        ]
     
     def __str__(self):
         source = self.media_upload or self.live_stream
@@ -122,6 +134,30 @@ class Alert(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['acknowledged', '-created_at'], name='alert_ack_created_idx'),
+            models.Index(fields=['severity', 'acknowledged', '-created_at'], name='alert_sev_ack_created_idx'),
+            models.Index(fields=['live_stream', '-created_at'], name='alert_stream_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.alert_type} - {self.severity} at {self.created_at}"
+
+
+class AnalysisResultHourly(models.Model):
+    """Per-hour rollup of AnalysisResult for the long analytics ranges.
+
+    Derived data: AnalysisResult stays the source of truth, and rollups.rollup_recent_hours()
+    rebuilds buckets from it.
+    """
+    hour_start = models.DateTimeField(unique=True)
+    analyses = models.IntegerField(default=0)
+    high_risk = models.IntegerField(default=0)
+    sum_people = models.BigIntegerField(default=0)
+    count_people = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-hour_start']
+    
+    def __str__(self):
+        return f"{self.hour_start:%Y-%m-%d %H:00} - {self.analyses} analyses"
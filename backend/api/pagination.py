@@ -0,0 +1,81 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+# Paging through a list re-runs the same COUNT(*) for every page; keep it briefly
+COUNT_CACHE_TIMEOUT = 60
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose total count is cached per distinct filtered query.
+
+    Counts may lag new rows by up to COUNT_CACHE_TIMEOUT seconds; nothing is
+    invalidated explicitly.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except Exception:
+            return super().count
+        key = 'pagecount:' + hashlib.md5(sql.encode()).hexdigest()
+        value = cache.get(key)
+        if value is None:
+            value = super().count
+            cache.set(key, value, COUNT_CACHE_TIMEOUT)
+        return value
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """Numbered pages for the list views, backed by CachedCountPaginator.
+
+    Bad or out-of-range ?page= values fall back to the nearest valid page (as
+    Paginator.get_page does) instead of erroring; bad ?page_size= uses the default.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    django_paginator_class = CachedCountPaginator
+
+    def __init__(self, page_size=None):
+        if page_size is not None:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        self.page = paginator.get_page(request.query_params.get(self.page_query_param))
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'count': self.page.paginator.count,
+            'num_pages': self.page.paginator.num_pages,
+            'current_page': self.page.number,
+            'has_next': self.page.has_next(),
+            'has_previous': self.page.has_previous()
+        })
+
+
+class KeysetPagination(CursorPagination):
+    """Opt-in cursor (keyset) pagination: no COUNT(*) and no OFFSET scan.
+
+    Returns {'next', 'previous', 'results'}; the numbered paginator stays the default.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+
+def wants_keyset(request):
+    """Clients opt in with ?pagination=cursor, then follow the returned cursor links"""
+    return 'cursor' in request.GET or request.GET.get('pagination') == 'cursor'
@@ -0,0 +1,70 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson  # Optional; several times faster than json.dumps and emits bytes directly
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack  # Optional; lets group events carry a pre-packed frame for msgpack viewers
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson when installed; plain DRF rendering otherwise.
+
+    NumPy scalars/arrays from the predictors serialize natively. Anything orjson
+    doesn't know (lazy strings, Decimal, ...) goes through DRF's JSONEncoder.
+    """
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not ORJSON_AVAILABLE:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        # Browsable/indented output is a debugging aid; leave it to DRF
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=self._encoder.default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def dumps_text(obj):
+    """JSON-encode a channel-layer payload to str; orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj)
+
+
+def _msgpack_default(obj):
+    # NumPy scalars/arrays from the predictors, datetimes as ISO strings (as in the JSON form)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f'Cannot msgpack-encode {type(obj).__name__}')
+
+
+def encode_event(obj):
+    """Channel-layer event fields for a payload, encoded once per group send.
+
+    'text' is the JSON form for text viewers; 'packed' (when msgpack is installed)
+    is the binary frame msgpack viewers forward as-is.
+    """
+    fields = {'text': dumps_text(obj)}
+    if MSGPACK_AVAILABLE:
+        fields['packed'] = msgpack.packb(obj, use_bin_type=True, default=_msgpack_default)
+    return fields
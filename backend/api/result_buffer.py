@@ -0,0 +1,69 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections
+
+from .models import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# Live-stream AnalysisResult rows are buffered and written with one bulk INSERT
+# per FLUSH_INTERVAL (or as soon as FLUSH_SIZE rows are waiting)
+FLUSH_INTERVAL = 0.2
+FLUSH_SIZE = 500
+
+_result_queue = queue.Queue()
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _drain():
+    batch = []
+    while True:
+        try:
+            batch.append(_result_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def flush():
+    """Write every buffered AnalysisResult; safe to call from any thread"""
+    with _flush_lock:
+        batch = _drain()
+        if not batch:
+            return 0
+        try:
+            AnalysisResult.objects.bulk_create(batch, batch_size=FLUSH_SIZE)
+        except Exception as e:
+            logger.error("Dropped %s buffered analysis results: %s", len(batch), e)
+            return 0
+        return len(batch)
+
+
+def _run():
+    while True:
+        # Woken early by enqueue() once a full batch is waiting
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        if not _result_queue.empty():
+            close_old_connections()
+            flush()
+
+
+def enqueue(result):
+    """Buffer an unsaved AnalysisResult; started lazily so imports stay side-effect free"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_run, name='analysis-result-writer', daemon=True)
+                _writer.start()
+                atexit.register(flush)
+    _result_queue.put(result)
+    if _result_queue.qsize() >= FLUSH_SIZE:
+        _wake.set()
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import AnalysisResult, AnalysisResultHourly
+
+# Each run rebuilds this many trailing hours, so an hour is final once a run
+# has happened after it closed (runs are scheduled every few minutes)
+ROLLUP_HOURS = 2
+
+
+def rollup_recent_hours(hours=ROLLUP_HOURS):
+    """Recompute the last `hours` hourly buckets from AnalysisResult and upsert them"""
+    current_hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    since = current_hour - timedelta(hours=hours - 1)
+    rows = (AnalysisResult.objects.filter(timestamp__gte=since)
+            .order_by()
+            .annotate(hour=TruncHour('timestamp'))
+            .values('hour')
+            .annotate(
+                analyses=Count('id'),
+                high_risk=Count('id', filter=Q(is_stampede_risk=True)),
+                sum_people=Sum('people_count'),
+                count_people=Count('people_count'),
+            ))
+    buckets = [
+        AnalysisResultHourly(
+            hour_start=row['hour'],
+            analyses=row['analyses'],
+            high_risk=row['high_risk'],
+            sum_people=row['sum_people'] or 0,
+            count_people=row['count_people'],
+        )
+        for row in rows
+    ]
+    AnalysisResultHourly.objects.bulk_create(
+        buckets,
+        update_conflicts=True,
+        unique_fields=['hour_start'],
+        update_fields=['analyses', 'high_risk', 'sum_people', 'count_people'],
+    )
+    return len(buckets)
+
+
+def summarize(start_time, now):
+    """(total, high_risk, avg_people) since start_time: rollups for whole past hours,
+    raw rows for the current hour. The partial hour at start_time is left out."""
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    first_hour = start_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    rolled = AnalysisResultHourly.objects.filter(
+        hour_start__gte=first_hour, hour_start__lt=current_hour
+    ).aggregate(
+        analyses=Sum('analyses'), high_risk=Sum('high_risk'),
+        sum_people=Sum('sum_people'), count_people=Sum('count_people'),
+    )
+    live = AnalysisResult.objects.filter(timestamp__gte=current_hour).aggregate(
+        analyses=Count('id'),
+        high_risk=Count('id', filter=Q(is_stampede_risk=True)),
+        sum_people=Sum('people_count'),
+        count_people=Count('people_count'),
+    )
+    total = (rolled['analyses'] or 0) + live['analyses']
+    high_risk = (rolled['high_risk'] or 0) + live['high_risk']
+    count_people = (rolled['count_people'] or 0) + live['count_people']
+    sum_people = (rolled['sum_people'] or 0) + (live['sum_people'] or 0)
+    return total, high_risk, (sum_people / count_people) if count_people else 0
@@ -13,11 +13,14 @@ class UserSerializer(serializers.Serializer):
 
 
 class UserRegistrationSerializer(serializers.Serializer):
+    # Read-only fields give .data the same shape as UserSerializer
+    id = serializers.IntegerField(read_only=True)
     username = serializers.CharField(max_length=150)
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True, min_length=8)
     first_name = serializers.CharField(max_length=30, required=False)
     last_name = serializers.CharField(max_length=30, required=False)
+    date_joined = serializers.DateTimeField(read_only=True)
     
     def validate_username(self, value):
         if User.objects.filter(username=value).exists():
@@ -37,82 +40,86 @@ class UserRegistrationSerializer(serializers.Serializer):
         return user
 
 
-class MediaUploadSerializer(serializers.Serializer):
-    id = serializers.IntegerField(read_only=True)
+class MediaUploadSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
-    media_type = serializers.ChoiceField(choices=MediaUpload.MEDIA_TYPES)
-    file = serializers.FileField()
-    filename = serializers.CharField(max_length=255, read_only=True)
-    file_size = serializers.IntegerField(read_only=True)
-    uploaded_at = serializers.DateTimeField(read_only=True)
     
-    # Analysis results
-    analysis_status = serializers.ChoiceField(choices=MediaUpload.ANALYSIS_STATUS, read_only=True)
-    crowd_detected = serializers.BooleanField(read_only=True)
-    confidence_score = serializers.FloatField(read_only=True)
-    people_count = serializers.IntegerField(read_only=True)
-    is_stampede_risk = serializers.BooleanField(read_only=True)
-    analysis_completed_at = serializers.DateTimeField(read_only=True)
-    analysis_result = serializers.JSONField(read_only=True)
-    
-    # Metadata
-    description = serializers.CharField(required=False, allow_blank=True)
-    location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'user', 'media_type', 'file', 'filename', 'file_size', 'uploaded_at',
+            # Analysis results
+            'analysis_status', 'crowd_detected', 'confidence_score', 'people_count',
+            'is_stampede_risk', 'analysis_completed_at', 'analysis_result',
+            # Metadata
+            'description', 'location',
+        ]
+        read_only_fields = [
+            'filename', 'file_size', 'uploaded_at',
+            'analysis_status', 'crowd_detected', 'confidence_score', 'people_count',
+            'is_stampede_risk', 'analysis_completed_at', 'analysis_result',
+        ]
     
     def create(self, validated_data):
         file_obj = validated_data['file']
         validated_data['filename'] = file_obj.name
         validated_data['file_size'] = file_obj.size
-        validated_data['user'] = self.context['request'].user
         return MediaUpload.objects.create(**validated_data)
 
 
-class LiveStreamSerializer(serializers.Serializer):
-    id = serializers.IntegerField(read_only=True)
+class MediaUploadListSerializer(MediaUploadSerializer):
+    """List rows without the analysis_result JSON blob (fetch the upload for that)"""
+
+    class Meta(MediaUploadSerializer.Meta):
+        fields = [f for f in MediaUploadSerializer.Meta.fields if f != 'analysis_result']
+
+
+class LiveStreamSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
-    stream_name = serializers.CharField(max_length=100)
-    stream_url = serializers.URLField(required=False, allow_blank=True)
-    status = serializers.ChoiceField(choices=LiveStream.STREAM_STATUS, read_only=True)
-    created_at = serializers.DateTimeField(read_only=True)
-    last_active = serializers.DateTimeField(read_only=True)
     
-    # Current analysis
-    current_crowd_status = serializers.BooleanField(read_only=True)
-    current_people_count = serializers.IntegerField(read_only=True)
-    current_confidence = serializers.FloatField(read_only=True)
+    class Meta:
+        model = LiveStream
+        fields = [
+            'id', 'user', 'stream_name', 'stream_url', 'status', 'created_at', 'last_active',
+            # Current analysis
+            'current_crowd_status', 'current_people_count', 'current_confidence',
+        ]
+        read_only_fields = [
+            'status', 'created_at', 'last_active',
+            'current_crowd_status', 'current_people_count', 'current_confidence',
+        ]
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return LiveStream.objects.create(**validated_data)
 
 
-class AnalysisResultSerializer(serializers.Serializer):
-    id = serializers.IntegerField(read_only=True)
-    media_upload_id = serializers.IntegerField(source='media_upload.id', read_only=True)
-    live_stream_id = serializers.IntegerField(source='live_stream.id', read_only=True)
+class AnalysisResultSerializer(serializers.ModelSerializer):
+    # Read the FK columns directly so listing results never loads the related rows
+    media_upload_id = serializers.IntegerField(read_only=True)
+    live_stream_id = serializers.IntegerField(read_only=True)
     
-    timestamp = serializers.DateTimeField(read_only=True)
-    crowd_detected = serializers.BooleanField()
-    confidence_score = serializers.FloatField()
-    people_count = serializers.IntegerField()
-    is_stampede_risk = serializers.BooleanField()
-    processing_time = serializers.FloatField()
-    model_version = serializers.CharField(max_length=50)
+    class Meta:
+        model = AnalysisResult
+        fields = [
+            'id', 'media_upload_id', 'live_stream_id', 'timestamp', 'crowd_detected',
+            'confidence_score', 'people_count', 'is_stampede_risk', 'processing_time',
+            'model_version',
+        ]
+        read_only_fields = ['timestamp']
 
 
-class AlertSerializer(serializers.Serializer):
-    id = serializers.IntegerField(read_only=True)
-    alert_type = serializers.ChoiceField(choices=Alert.ALERT_TYPES)
-    severity = serializers.ChoiceField(choices=Alert.ALERT_SEVERITY)
-    message = serializers.CharField()
-    
-    analysis_result_id = serializers.IntegerField(source='analysis_result.id', read_only=True)
-    live_stream_id = serializers.IntegerField(source='live_stream.id', read_only=True)
-    
-    created_at = serializers.DateTimeField(read_only=True)
-    acknowledged = serializers.BooleanField(read_only=True)
+class AlertSerializer(serializers.ModelSerializer):
+    analysis_result_id = serializers.IntegerField(read_only=True)
+    live_stream_id = serializers.IntegerField(read_only=True)
     acknowledged_by = UserSerializer(read_only=True)
-    acknowledged_at = serializers.DateTimeField(read_only=True)
+    
+    class Meta:
+        model = Alert
+        fields = [
+            'id', 'alert_type', 'severity', 'message', 'analysis_result_id', 'live_stream_id',
+            'created_at', 'acknowledged', 'acknowledged_by', 'acknowledged_at',
+        ]
+        read_only_fields = ['created_at', 'acknowledged', 'acknowledged_at']
 
 
 class StreamAnalysisSerializer(serializers.Serializer):
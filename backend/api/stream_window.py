@@ -0,0 +1,65 @@
+import collections
+import json
+import logging
+import threading
+
+from django.conf import settings
+
+try:
+    import redis  # Optional; shares the window across web workers when REDIS_URL is set
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Rolling window of the last WINDOW_SIZE (people_count, is_stampede_risk) pairs per
+# stream, used for temporal smoothing without reading AnalysisResult rows back
+WINDOW_SIZE = 5
+WINDOW_TTL = 3600  # idle streams' keys expire after an hour
+
+_client = None
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _redis():
+    global _client
+    if _client is None and REDIS_AVAILABLE and getattr(settings, 'REDIS_URL', ''):
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def push(stream_id, people_count, is_risk):
+    """Record one frame and return the window newest-first, this frame included"""
+    client = _redis()
+    if client is not None:
+        key = f'stream:{stream_id}:recent'
+        try:
+            pipe = client.pipeline()
+            pipe.lpush(key, json.dumps([people_count, bool(is_risk)]))
+            pipe.ltrim(key, 0, WINDOW_SIZE - 1)
+            pipe.expire(key, WINDOW_TTL)
+            pipe.lrange(key, 0, WINDOW_SIZE - 1)
+            return [tuple(json.loads(item)) for item in pipe.execute()[-1]]
+        except Exception as e:
+            logger.warning("Redis window unavailable, using process-local window: %s", e)
+    with _local_lock:
+        window = _local.get(stream_id)
+        if window is None:
+            window = _local[stream_id] = collections.deque(maxlen=WINDOW_SIZE)
+        window.appendleft((people_count, bool(is_risk)))
+        return list(window)
+
+
+def smooth(window):
+    """(smoothed_people, smoothed_risk) for a newest-first window, in a single pass"""
+    total = n = risky = 0
+    for count, is_risk in window:
+        if count is not None:
+            total += count
+            n += 1
+        risky += is_risk
+    smoothed_people = int(round(total / n)) if n else 0
+    return smoothed_people, risky >= max(2, len(window) // 2)
@@ -0,0 +1,53 @@
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    CELERY_AVAILABLE = False
+
+# Offload is opt-in: without a broker the views keep running inference in-process
+CELERY_ENABLED = CELERY_AVAILABLE and bool(getattr(settings, 'CELERY_BROKER_URL', ''))
+
+if CELERY_AVAILABLE:
+
+    @shared_task(name='api.analyze_frame_task', ignore_result=True)
+    def analyze_frame_task(stream_id, frame_data, user_id):
+        """Score a live-stream frame on an inference worker; results go out over the channel layer"""
+        from .models import LiveStream
+        from .views import _analyze_stream_frame
+
+        try:
+            stream = LiveStream.objects.get(id=stream_id, user_id=user_id)
+        except LiveStream.DoesNotExist:
+            logger.warning("Frame task for missing stream %s", stream_id)
+            return None
+        payload, _ = _analyze_stream_frame(stream, frame_data)
+        return payload
+
+    @shared_task(bind=True, name='api.analyze_media_task', max_retries=3, default_retry_delay=2,
+                 ignore_result=True)
+    def analyze_media_task(self, media_upload_id):
+        """Analyze an uploaded photo/video on a media worker"""
+        from .models import MediaUpload
+        from .views import analyze_media_async
+
+        # The upload row can reach the worker before the web request's commit does
+        if not MediaUpload.objects.filter(id=media_upload_id).exists():
+            raise self.retry()
+        analyze_media_async(media_upload_id)
+
+    @shared_task(name='api.rollup_analytics_task', ignore_result=True)
+    def rollup_analytics_task():
+        """Refresh the hourly analytics rollups (scheduled by Celery beat)"""
+        from .rollups import rollup_recent_hours
+
+        return rollup_recent_hours()
+else:
+    analyze_frame_task = None
+    analyze_media_task = None
+    rollup_analytics_task = None
@@ -7,6 +7,8 @@ urlpatterns = [
     
     # Health check
     path('health/', views.health_check, name='health_check'),
+    path('readyz/', views.health_check, name='readiness'),
+    path('livez/', views.liveness, name='liveness'),
     
     # Authentication
     path('auth/register/', views.register, name='register'),
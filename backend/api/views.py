@@ -3,65 +3,90 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.http import HttpResponse
 from django.utils import timezone
-from django.core.paginator import Paginator
-from django.db.models import Q, Avg
-from django.db import models
+from django.db.models import Q, Avg, Count, FloatField
+from django.db.models.functions import Coalesce, TruncHour
+from django.db import connection, models, transaction
 import json
 import base64
+import logging
+import os
 import time
-import traceback
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
 from .models import MediaUpload, LiveStream, AnalysisResult, Alert
+from .pagination import KeysetPagination, StandardPageNumberPagination, wants_keyset
 from .serializers import (
-    UserSerializer, UserRegistrationSerializer, MediaUploadSerializer,
+    UserSerializer, UserRegistrationSerializer, MediaUploadSerializer, MediaUploadListSerializer,
     LiveStreamSerializer, AnalysisResultSerializer, AlertSerializer
 )
-from .ai_predictor_fixed import get_predictor
+from .ai_predictor_fixed import get_predictor, loaded_predictor
+from . import result_buffer, rollups, stream_window
+from .renderers import encode_event
+from .tasks import CELERY_ENABLED, analyze_frame_task, analyze_media_task
+
+logger = logging.getLogger(__name__)
+
+# In-process media analysis (no task queue): a bounded pool queues uploads
+# instead of starting a thread per upload
+_ANALYSIS_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ANALYSIS_POOL', '4')), thread_name_prefix='media-analysis'
+)
+
+
+# Static part of the api_root response, built once at import
+_API_ROOT = {
+    'message': 'CrowdControl API v1.0',
+    'description': 'AI-powered crowd control and stampede detection system',
+    'endpoints': {
+        'health': '/api/health/',
+        'authentication': {
+            'register': '/api/auth/register/',
+            'login': '/api/auth/login/',
+            'profile': '/api/auth/profile/',
+        },
+        'media': {
+            'upload': '/api/media/upload/',
+            'list': '/api/media/list/',
+            'detail': '/api/media/{id}/',
+        },
+        'streams': {
+            'create': '/api/streams/create/',
+            'list': '/api/streams/list/',
+            'detail': '/api/streams/{id}/',
+            'start': '/api/streams/{id}/start/',
+            'stop': '/api/streams/{id}/stop/',
+        },
+        'analysis': {
+            'frame': '/api/analysis/frame/',
+            'results': '/api/analysis/results/',
+        },
+        'alerts': {
+            'list': '/api/alerts/',
+            'acknowledge': '/api/alerts/{id}/acknowledge/',
+        }
+    },
+    'status': 'healthy',
+}
+# ...and pre-rendered, leaving the closing brace off so the timestamp can be appended
+_API_ROOT_PREFIX = json.dumps(_API_ROOT, separators=(',', ':'))[:-1].encode()
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_root(request):
     """Shows all available API endpoints - like a directory"""
-    return Response({
-        'message': 'CrowdControl API v1.0',
-        'description': 'AI-powered crowd control and stampede detection system',
-        'endpoints': {
-            'health': '/api/health/',
-            'authentication': {
-                'register': '/api/auth/register/',
-                'login': '/api/auth/login/',
-                'profile': '/api/auth/profile/',
-            },
-            'media': {
-                'upload': '/api/media/upload/',
-                'list': '/api/media/list/',
-                'detail': '/api/media/{id}/',
-            },
-            'streams': {
-                'create': '/api/streams/create/',
-                'list': '/api/streams/list/',
-                'detail': '/api/streams/{id}/',
-                'start': '/api/streams/{id}/start/',
-                'stop': '/api/streams/{id}/stop/',
-            },
-            'analysis': {
-                'frame': '/api/analysis/frame/',
-                'results': '/api/analysis/results/',
-            },
-            'alerts': {
-                'list': '/api/alerts/',
-                'acknowledge': '/api/alerts/{id}/acknowledge/',
-            }
-        },
-        'status': 'healthy',
-        'timestamp': timezone.now().isoformat()
-    })
+    # Plain HttpResponse: skips DRF content negotiation and rendering for a static body
+    body = _API_ROOT_PREFIX + b',"timestamp":"' + timezone.now().isoformat().encode() + b'"}'
+    return HttpResponse(body, content_type='application/json')
 
 
 @api_view(['POST'])
@@ -73,7 +98,7 @@ def register(request):
         user = serializer.save()
         refresh = RefreshToken.for_user(user)
         return Response({
-            'user': UserSerializer(user).data,
+            'user': serializer.data,
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
@@ -113,15 +138,34 @@ def profile(request):
     return Response(UserSerializer(request.user).data)
 
 
+# Slack for multipart boundaries, part headers and the description/location fields,
+# so the header check only rejects bodies that cannot hold a file within the limit
+_MULTIPART_OVERHEAD = 64 * 1024
+_ALLOWED_UPLOAD_TYPES = frozenset({
+    'image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif',
+    'video/mp4', 'video/avi', 'video/mov', 'video/wmv', 'video/webm'
+})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_media(request):
     """Upload photo or video for analysis"""
     try:
-        # Log the incoming request for debugging
-        print(f"Upload request from user: {request.user.username}")
-        print(f"Files: {list(request.FILES.keys())}")
-        print(f"Data: {dict(request.data)}")
+        # Reject clearly oversized uploads from the header, before the body is read at all;
+        # the exact per-file check below enforces the limit on the file part itself
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > settings.MAX_UPLOAD_SIZE + _MULTIPART_OVERHEAD:
+            return Response({
+                'error': 'File too large',
+                'detail': f'Upload size ({content_length / (1024*1024):.1f}MB) exceeds the '
+                          f'{settings.MAX_UPLOAD_SIZE // (1024*1024)}MB limit'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        logger.debug("Upload request from user %s, files: %s", request.user.username, list(request.FILES.keys()))
         
         # Validate file presence
         if 'file' not in request.FILES:
@@ -130,38 +174,30 @@ def upload_media(request):
                 'detail': 'Please select a file to upload'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        file_obj = request.FILES['file']
+        files = request.FILES.getlist('file')
+        for file_obj in files:
+            error = _upload_file_error(file_obj)
+            if error is not None:
+                return error
         
-        # Validate file size (100MB limit)
-        max_size = 100 * 1024 * 1024  # 100MB
-        if file_obj.size > max_size:
-            return Response({
-                'error': 'File too large',
-                'detail': f'File size ({file_obj.size / (1024*1024):.1f}MB) exceeds the 100MB limit'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Validate file type
-        allowed_types = [
-            'image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif',
-            'video/mp4', 'video/avi', 'video/mov', 'video/wmv', 'video/webm'
-        ]
-        if file_obj.content_type not in allowed_types:
-            return Response({
-                'error': 'Invalid file type',
-                'detail': f'File type {file_obj.content_type} is not supported. Allowed types: images (JPEG, PNG, WebP, GIF) and videos (MP4, AVI, MOV, WMV, WebM)'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(files) > 1:
+            return _upload_media_batch(request, files)
         
-        serializer = MediaUploadSerializer(data=request.data, context={'request': request})
+        # No request context: the owner comes in through save(), and the response keeps the
+        # relative file URL every other media endpoint returns
+        serializer = MediaUploadSerializer(data=request.data)
         if serializer.is_valid():
-            media_upload = serializer.save()
+            media_upload = serializer.save(user=request.user)
             
-            # Run AI analysis in the background so user doesn't have to wait
-            import threading
-            analysis_thread = threading.Thread(target=analyze_media_async, args=(media_upload.id,))
-            analysis_thread.daemon = True
-            analysis_thread.start()
+            # Run AI analysis in the background so user doesn't have to wait:
+            # on a media worker when a task queue is configured, else in a thread
+            if CELERY_ENABLED:
+                upload_id = media_upload.id
+                transaction.on_commit(lambda: analyze_media_task.delay(upload_id))
+            else:
+                _ANALYSIS_POOL.submit(analyze_media_async, media_upload.id)
             
-            return Response(MediaUploadSerializer(media_upload).data, status=status.HTTP_201_CREATED)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             # Return detailed validation errors
             error_details = []
@@ -176,19 +212,80 @@ def upload_media(request):
             }, status=status.HTTP_400_BAD_REQUEST)
             
     except Exception as e:
-        print(f"Upload error: {str(e)}")
+        logger.exception("Upload error")
         return Response({
             'error': 'Upload failed',
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _upload_file_error(file_obj):
+    """400 response for a file part that is too large or of an unsupported type, else None"""
+    # Validate file size (chunked uploads carry no Content-Length)
+    max_size = settings.MAX_UPLOAD_SIZE
+    if file_obj.size > max_size:
+        return Response({
+            'error': 'File too large',
+            'detail': f'File size ({file_obj.size / (1024*1024):.1f}MB) exceeds the {max_size // (1024*1024)}MB limit'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Validate file type
+    if file_obj.content_type not in _ALLOWED_UPLOAD_TYPES:
+        return Response({
+            'error': 'Invalid file type',
+            'detail': f'File type {file_obj.content_type} is not supported. Allowed types: images (JPEG, PNG, WebP, GIF) and videos (MP4, AVI, MOV, WMV, WebM)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def _schedule_media_batch(upload_ids):
+    """Queue analysis for uploads stored together by one request"""
+    if CELERY_ENABLED:
+        # Separate tasks spread the batch across media workers
+        for upload_id in upload_ids:
+            analyze_media_task.delay(upload_id)
+    else:
+        _ANALYSIS_POOL.submit(analyze_media_batch_async, upload_ids)
+
+
+def _upload_media_batch(request, files):
+    """Store several files sent as repeated 'file' parts and analyze them as one batch"""
+    fields = {key: value for key, value in request.data.items() if key != 'file'}
+    pending = [
+        MediaUploadSerializer(data={**fields, 'file': file_obj})
+        for file_obj in files
+    ]
+    invalid = [(file_obj, ser) for file_obj, ser in zip(files, pending) if not ser.is_valid()]
+    if invalid:
+        error_details = [
+            f"{file_obj.name}: {field}: {error}"
+            for file_obj, ser in invalid
+            for field, errors in ser.errors.items()
+            for error in errors
+        ]
+        return Response({
+            'error': 'Validation failed',
+            'detail': '; '.join(error_details),
+            'field_errors': {file_obj.name: ser.errors for file_obj, ser in invalid}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        uploads = [ser.save(user=request.user) for ser in pending]
+        upload_ids = [upload.id for upload in uploads]
+        transaction.on_commit(lambda: _schedule_media_batch(upload_ids))
+    
+    return Response(
+        [ser.data for ser in pending],
+        status=status.HTTP_201_CREATED
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_media_upload_detail(request, upload_id):
     """Get detailed information about a specific media upload including analysis results"""
     try:
-        media_upload = MediaUpload.objects.get(id=upload_id, user=request.user)
+        media_upload = MediaUpload.objects.select_related('user').get(id=upload_id, user=request.user)
         
         # Get the serialized data
         upload_data = MediaUploadSerializer(media_upload).data
@@ -240,7 +337,7 @@ def get_media_upload_detail(request, upload_id):
 @permission_classes([IsAuthenticated])
 def list_media_uploads(request):
     """List user's media uploads with pagination"""
-    uploads = MediaUpload.objects.filter(user=request.user)
+    uploads = MediaUpload.objects.filter(user=request.user).select_related('user')
     
     # Let users filter by photo/video if they want
     media_type = request.GET.get('media_type')
@@ -252,20 +349,16 @@ def list_media_uploads(request):
     if analysis_status:
         uploads = uploads.filter(analysis_status=analysis_status)
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    page_size = int(request.GET.get('page_size', 10))
-    paginator = Paginator(uploads, page_size)
-    page_obj = paginator.get_page(page)
+    # The per-upload analysis_result JSON is the widest column; only ship it on request
+    serializer_class = MediaUploadSerializer
+    if request.GET.get('full') != 'true':
+        uploads = uploads.defer('analysis_result')
+        serializer_class = MediaUploadListSerializer
     
-    return Response({
-        'results': MediaUploadSerializer(page_obj.object_list, many=True).data,
-        'count': paginator.count,
-        'num_pages': paginator.num_pages,
-        'current_page': page,
-        'has_next': page_obj.has_next(),
-        'has_previous': page_obj.has_previous()
-    })
+    # Pagination
+    paginator = StandardPageNumberPagination()
+    page_items = paginator.paginate_queryset(uploads, request)
+    return paginator.get_paginated_response(serializer_class(page_items, many=True).data)
 
 
 @api_view(['GET'])
@@ -273,7 +366,7 @@ def list_media_uploads(request):
 def get_media_upload(request, upload_id):
     """Get specific media upload details"""
     try:
-        upload = MediaUpload.objects.get(id=upload_id, user=request.user)
+        upload = MediaUpload.objects.select_related('user').get(id=upload_id, user=request.user)
         return Response(MediaUploadSerializer(upload).data)
     except MediaUpload.DoesNotExist:
         return Response({'error': 'Media upload not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -285,8 +378,8 @@ def create_live_stream(request):
     """Create a new live stream"""
     serializer = LiveStreamSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
-        live_stream = serializer.save()
-        return Response(LiveStreamSerializer(live_stream).data, status=status.HTTP_201_CREATED)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -295,8 +388,12 @@ def create_live_stream(request):
 @permission_classes([IsAuthenticated])
 def list_live_streams(request):
     """List user's live streams"""
-    streams = LiveStream.objects.filter(user=request.user)
-    return Response(LiveStreamSerializer(streams, many=True).data)
+    # Every row belongs to request.user, so plain .values() dicts plus one serialized
+    # user give the LiveStreamSerializer shape without per-row field conversion
+    user_data = UserSerializer(request.user).data
+    fields = [name for name in LiveStreamSerializer.Meta.fields if name != 'user']
+    streams = LiveStream.objects.filter(user=request.user).values(*fields)
+    return Response([{**stream, 'user': user_data} for stream in streams])
 
 
 @api_view(['GET', 'PUT', 'DELETE'])
@@ -304,7 +401,7 @@ def list_live_streams(request):
 def manage_live_stream(request, stream_id):
     """Get, update, or delete a live stream"""
     try:
-        stream = LiveStream.objects.get(id=stream_id, user=request.user)
+        stream = LiveStream.objects.select_related('user').get(id=stream_id, user=request.user)
     except LiveStream.DoesNotExist:
         return Response({'error': 'Live stream not found'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -314,8 +411,8 @@ def manage_live_stream(request, stream_id):
     elif request.method == 'PUT':
         serializer = LiveStreamSerializer(stream, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            stream = serializer.save()
-            return Response(LiveStreamSerializer(stream).data)
+            serializer.save()
+            return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
@@ -328,10 +425,10 @@ def manage_live_stream(request, stream_id):
 def start_stream(request, stream_id):
     """Start a live stream"""
     try:
-        stream = LiveStream.objects.get(id=stream_id, user=request.user)
+        stream = LiveStream.objects.select_related('user').get(id=stream_id, user=request.user)
         stream.status = 'active'
         stream.last_active = timezone.now()
-        stream.save()
+        stream.save(update_fields=['status', 'last_active'])
         
         return Response({
             'message': 'Stream started successfully',
@@ -346,9 +443,9 @@ def start_stream(request, stream_id):
 def stop_stream(request, stream_id):
     """Stop a live stream"""
     try:
-        stream = LiveStream.objects.get(id=stream_id, user=request.user)
+        stream = LiveStream.objects.select_related('user').get(id=stream_id, user=request.user)
         stream.status = 'inactive'
-        stream.save()
+        stream.save(update_fields=['status'])
         
         return Response({
             'message': 'Stream stopped successfully',
@@ -358,121 +455,181 @@ def stop_stream(request, stream_id):
         return Response({'error': 'Live stream not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def analyze_frame(request):
-    """Analyze a single frame from live stream"""
+# Non-risky stream_update broadcasts per stream are limited to one per interval (5 Hz)
+STREAM_BROADCAST_INTERVAL = 0.2
+_last_broadcast = {}
+# A stream stuck in a risky state flags every frame; the alerts group hears about it
+# at most once per ALERT_BROADCAST_INTERVAL (every Alert row is still stored), except
+# that an escalation above the last broadcast severity is always sent
+ALERT_BROADCAST_INTERVAL = 1.0
+_ALERT_SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+_last_alert_broadcast = {}
+_group_send = None
+
+
+def _broadcast(group, message):
+    """group_send through one cached sync wrapper around the default channel layer"""
+    global _group_send
+    if _group_send is None:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        _group_send = async_to_sync(channel_layer.group_send)
+    _group_send(group, message)
+
+
+def _broadcast_alert(stream_id, alert):
+    """Throttled send of an alert payload to the 'alerts' group"""
+    now = time.monotonic()
+    rank = _ALERT_SEVERITY_RANK.get(alert.get('severity'), 0)
+    last_sent, last_rank = _last_alert_broadcast.get(stream_id, (0.0, -1))
+    if now - last_sent < ALERT_BROADCAST_INTERVAL and rank <= last_rank:
+        return
+    _last_alert_broadcast[stream_id] = (now, rank)
     try:
-        stream_id = request.data.get('stream_id')
-        frame_data = request.data.get('frame_data')  # Base64 encoded image
-        
-        if not stream_id or not frame_data:
-            return Response({
-                'error': 'stream_id and frame_data are required'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Make sure this stream belongs to the current user
-        try:
-            stream = LiveStream.objects.get(id=stream_id, user=request.user)
-        except LiveStream.DoesNotExist:
-            return Response({'error': 'Live stream not found'}, status=status.HTTP_404_NOT_FOUND)
+        _broadcast('alerts', {'type': 'alert_message', **encode_event(alert)})
+    except Exception as e:
+        logger.warning("Alert broadcast error: %s", e)
+
+
+_STREAM_STATUS_FIELDS = [name for name in LiveStreamSerializer.Meta.fields if name != 'user']
+
+
+def _stream_status(stream):
+    """LiveStreamSerializer-shaped dict built straight from the instance (per-frame response)"""
+    data = {name: getattr(stream, name) for name in _STREAM_STATUS_FIELDS}
+    data['user'] = UserSerializer(stream.user).data
+    return data
+
+
+def _stored_window(stream):
+    """Last stored frames for a stream whose rolling window is empty (restart or expiry)"""
+    return list(AnalysisResult.objects.filter(live_stream=stream)
+                .order_by('-timestamp')
+                .values_list('people_count', 'is_stampede_risk')[:stream_window.WINDOW_SIZE - 1])
+
+
+def _analyze_stream_frame(stream, frame_data):
+    """Score one live-stream frame, update the stream, store and broadcast the result.
+
+    Shared by analyze_frame and the Celery analyze_frame_task; returns (payload, status).
+    """
+    # Analyze frame with enhanced error handling
+    start_time = time.time()
+    try:
+        predictor = get_predictor()
+        analysis = predictor.predict_crowd(frame_data)
+        processing_time = time.time() - start_time
         
-        # Analyze frame with enhanced error handling
-        start_time = time.time()
-        try:
-            predictor = get_predictor()
-            print(f"Analyzing frame for stream {stream_id}...")
-            analysis = predictor.predict_crowd(frame_data)
-            processing_time = time.time() - start_time
-            print(f"Analysis completed in {processing_time:.3f}s: {analysis}")
-            
-            # Handle analysis errors
-            if 'error' in analysis:
-                print(f"Analysis error: {analysis['error']}")
-                return Response({
-                    'error': analysis['error'],
-                    'fallback_mode': True
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except Exception as e:
-            processing_time = time.time() - start_time
-            print(f"Frame analysis exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        # Handle analysis errors
+        if 'error' in analysis:
+            logger.warning("Frame analysis error for stream %s: %s", stream.id, analysis['error'])
+            return {
+                'error': analysis['error'],
+                'fallback_mode': True
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR
             
-            # Return fallback analysis instead of error
-            analysis = {
-                'crowd_detected': False,
-                'confidence_score': 0.5,
-                'people_count': 1,
-                'is_stampede_risk': False,
-                'fallback_mode': True,
-                'error': str(e)
-            }
-        
-        # Update stream status
-        stream.current_crowd_status = analysis['crowd_detected']
-        stream.current_people_count = analysis['people_count']
-        stream.current_confidence = analysis['confidence_score']
-        stream.last_active = timezone.now()
-        stream.save()
+    except Exception as e:
+        processing_time = time.time() - start_time
+        logger.exception("Frame analysis exception for stream %s", stream.id)
         
-        # Save analysis result
-        analysis_result = AnalysisResult.objects.create(
-            live_stream=stream,
-            crowd_detected=analysis['crowd_detected'],
-            confidence_score=analysis['confidence_score'],
-            people_count=analysis['people_count'],
-            is_stampede_risk=analysis['is_stampede_risk'],
-            processing_time=processing_time
-        )
+        # Return fallback analysis instead of error
+        analysis = {
+            'crowd_detected': False,
+            'confidence_score': 0.5,
+            'people_count': 1,
+            'is_stampede_risk': False,
+            'fallback_mode': True,
+            'error': str(e)
+        }
+    
+    # Update stream status (written below with a narrow UPDATE, together with the
+    # result/alert rows when there are any)
+    stream_fields = {
+        'current_crowd_status': analysis['crowd_detected'],
+        'current_people_count': analysis['people_count'],
+        'current_confidence': analysis['confidence_score'],
+        'last_active': timezone.now(),
+    }
+    for field, value in stream_fields.items():
+        setattr(stream, field, value)
+    
+    # Build the analysis result; it is saved below (immediately if it raises an alert)
+    analysis_result = AnalysisResult(
+        live_stream=stream,
+        crowd_detected=analysis['crowd_detected'],
+        confidence_score=analysis['confidence_score'],
+        people_count=analysis['people_count'],
+        is_stampede_risk=analysis['is_stampede_risk'],
+        processing_time=processing_time
+    )
 
-        # Temporal smoothing over recent frames to reduce jitter and false positives
-        try:
-            recent_results = AnalysisResult.objects.filter(
-                live_stream=stream
-            ).order_by('-timestamp')[:5]
-            counts = [r.people_count for r in recent_results if r.people_count is not None]
-            risks = [1 if r.is_stampede_risk else 0 for r in recent_results]
-            smoothed_people = int(round(sum(counts) / len(counts))) if counts else analysis['people_count']
-            smoothed_risk_flag = (sum(risks) >= max(2, len(risks) // 2)) if risks else analysis['is_stampede_risk']
-        except Exception:
-            smoothed_people = analysis['people_count']
-            smoothed_risk_flag = analysis['is_stampede_risk']
+    # Temporal smoothing over recent frames to reduce jitter and false positives
+    try:
+        recent = stream_window.push(stream.id, analysis['people_count'], analysis['is_stampede_risk'])
+        if len(recent) == 1:
+            recent += _stored_window(stream)
+        smoothed_people, smoothed_risk_flag = stream_window.smooth(recent)
+    except Exception:
+        smoothed_people = analysis['people_count']
+        smoothed_risk_flag = analysis['is_stampede_risk']
 
-        # Compute a normalized risk score to share with clients (0..1)
-        try:
-            raw_score = min(1.0, analysis['people_count'] / 12.0)
-            conf_boost = max(0.0, min(1.0, analysis['confidence_score']))
-            risk_score = round(0.5 * raw_score + 0.5 * conf_boost * raw_score, 3)
-        except Exception:
-            risk_score = 0.0
+    # Compute a normalized risk score to share with clients (0..1)
+    try:
+        raw_score = min(1.0, analysis['people_count'] / 12.0)
+        conf_boost = max(0.0, min(1.0, analysis['confidence_score']))
+        risk_score = round(0.5 * raw_score + 0.5 * conf_boost * raw_score, 3)
+    except Exception:
+        risk_score = 0.0
 
-        # Send real-time updates to anyone watching this stream
+    is_alert = analysis['is_stampede_risk'] or smoothed_risk_flag
+    alert = {
+        'alert_type': 'stampede_risk',
+        'severity': 'critical' if analysis['is_stampede_risk'] else 'high',
+        'message': (
+            f'Stampede risk detected in stream {stream.stream_name} '
+            f'(smoothed people={smoothed_people}, score={risk_score:.2f}).'
+        ),
+        'stream_id': stream.id,
+        'timestamp': timezone.now().isoformat(),
+    } if is_alert else None
+
+    # Send real-time updates to anyone watching this stream, coalesced to at most
+    # one per STREAM_BROADCAST_INTERVAL unless the frame is risky. Stream viewers
+    # get the alert inside the same message
+    now = time.monotonic()
+    if is_alert or now - _last_broadcast.get(stream.id, 0.0) >= STREAM_BROADCAST_INTERVAL:
+        _last_broadcast[stream.id] = now
         try:
-            channel_layer = get_channel_layer()
-            if channel_layer:
-                async_to_sync(channel_layer.group_send)(
-                    f'stream_{stream.id}',
-                    {
-                        'type': 'stream_update',
-                        'data': {
-                            'stream_id': stream.id,
-                            'timestamp': timezone.now().isoformat(),
-                            'analysis': {
-                                **analysis,
-                                'risk_score': risk_score,
-                                'smoothed_people_count': smoothed_people,
-                                'smoothed_risk': smoothed_risk_flag,
-                            },
-                        }
-                    }
-                )
+            _broadcast(
+                f'stream_{stream.id}',
+                {
+                    'type': 'stream_update',
+                    # Encoded once here instead of once per connected viewer
+                    **encode_event({
+                        'stream_id': stream.id,
+                        'timestamp': timezone.now().isoformat(),
+                        'analysis': {
+                            **analysis,
+                            'risk_score': risk_score,
+                            'smoothed_people_count': smoothed_people,
+                            'smoothed_risk': smoothed_risk_flag,
+                        },
+                        'alert': alert,
+                    })
+                }
+            )
         except Exception as e:
-            print(f"WebSocket broadcast error: {str(e)}")
+            logger.warning("WebSocket broadcast error: %s", e)
 
-        # If AI thinks there's danger, create an alert
-        if analysis['is_stampede_risk'] or smoothed_risk_flag:
+    # If AI thinks there's danger, create an alert. Alert rows reference the
+    # result, so those are written synchronously; everything else is buffered
+    # and bulk-inserted by the result writer thread
+    if is_alert:
+        # Stream update, result and alert commit together
+        with transaction.atomic():
+            LiveStream.objects.filter(id=stream.id).update(**stream_fields)
+            analysis_result.save()
             Alert.objects.create(
                 alert_type='stampede_risk',
                 severity='critical' if analysis['is_stampede_risk'] else 'high',
@@ -485,33 +642,169 @@ def analyze_frame(request):
                 analysis_result=analysis_result,
                 live_stream=stream
             )
-            # Send alert to all connected users immediately
-            try:
-                if channel_layer:
-                    async_to_sync(channel_layer.group_send)(
-                        'alerts',
-                        {
-                            'type': 'alert_message',
-                            'data': {
-                                'alert_type': 'stampede_risk',
-                                'severity': 'critical' if analysis['is_stampede_risk'] else 'high',
-                                'message': (
-                                    f'Stampede risk detected in stream {stream.stream_name} '
-                                    f'(smoothed people={smoothed_people}, score={risk_score:.2f}).'
-                                ),
-                                'stream_id': stream.id,
-                                'timestamp': timezone.now().isoformat(),
-                            }
-                        }
-                    )
-            except Exception as e:
-                print(f"Alert broadcast error: {str(e)}")
+        cache.delete(ALERT_STATS_CACHE_KEY)
+        # Let everyone on the alerts socket know
+        _broadcast_alert(stream.id, alert)
+    else:
+        LiveStream.objects.filter(id=stream.id).update(**stream_fields)
+        result_buffer.enqueue(analysis_result)
+    
+    return {
+        'analysis': analysis,
+        'processing_time': processing_time,
+        'stream_status': _stream_status(stream)
+    }, status.HTTP_200_OK
+
+
+def score_stream_frames(frames):
+    """Run the predictor over a batch of (received_at, frame_data) pairs, oldest first.
+
+    Touches no database state, so the stream consumer runs it off the shared
+    sync thread. Returns the analyses and the per-frame processing time.
+    """
+    start_time = time.time()
+    analyses = get_predictor().predict_crowd_batch([frame for _, frame in frames])
+    return analyses, (time.time() - start_time) / len(frames)
+
+
+def record_stream_frames(stream, frames, analyses, processing_time):
+    """Store and broadcast the analyses score_stream_frames produced for one stream.
+
+    One stream UPDATE, one bulk INSERT and one broadcast per batch instead of per
+    frame. Returns how many frames were scored successfully.
+    """
+    scored = [(ts, a) for (ts, _), a in zip(frames, analyses) if 'error' not in a]
+    if not scored:
+        return 0
+    results = [
+        AnalysisResult(
+            live_stream=stream,
+            timestamp=ts,
+            crowd_detected=a['crowd_detected'],
+            confidence_score=a['confidence_score'],
+            people_count=a['people_count'],
+            is_stampede_risk=a['is_stampede_risk'],
+            processing_time=processing_time,
+        )
+        for ts, a in scored
+    ]
+
+    # Same rolling smoothing window as _analyze_stream_frame, advanced frame by frame
+    alerts = []
+    for result, (_, analysis) in zip(results, scored):
+        recent = stream_window.push(stream.id, result.people_count, result.is_stampede_risk)
+        if len(recent) == 1:
+            recent += _stored_window(stream)
+        smoothed_people, smoothed_risk_flag = stream_window.smooth(recent)
+        if analysis['is_stampede_risk'] or smoothed_risk_flag:
+            alerts.append((result, analysis, smoothed_people))
+
+    latest = scored[-1][1]
+    stream_fields = {
+        'current_crowd_status': latest['crowd_detected'],
+        'current_people_count': latest['people_count'],
+        'current_confidence': latest['confidence_score'],
+        'last_active': timezone.now(),
+    }
+    with transaction.atomic():
+        LiveStream.objects.filter(id=stream.id).update(**stream_fields)
+        AnalysisResult.objects.bulk_create(results)
+        if alerts:
+            Alert.objects.bulk_create([
+                Alert(
+                    alert_type='stampede_risk',
+                    severity='critical' if analysis['is_stampede_risk'] else 'high',
+                    message=(
+                        f'Stampede risk detected in stream {stream.stream_name}. '
+                        f'People (raw/smoothed): {analysis["people_count"]}/{smoothed_people}, '
+                        f'Confidence: {analysis["confidence_score"]:.2f}'
+                    ),
+                    analysis_result=result,
+                    live_stream=stream
+                )
+                for result, analysis, smoothed_people in alerts
+            ])
+    if alerts:
+        cache.delete(ALERT_STATS_CACHE_KEY)
+
+    try:
+        raw_score = min(1.0, latest['people_count'] / 12.0)
+        conf_boost = max(0.0, min(1.0, latest['confidence_score']))
+        risk_score = round(0.5 * raw_score + 0.5 * conf_boost * raw_score, 3)
+    except Exception:
+        risk_score = 0.0
+    alert = None
+    if alerts:
+        _, analysis, alert_people = alerts[-1]
+        alert = {
+            'alert_type': 'stampede_risk',
+            'severity': 'critical' if analysis['is_stampede_risk'] else 'high',
+            'message': (
+                f'Stampede risk detected in stream {stream.stream_name} '
+                f'(smoothed people={alert_people}, {len(alerts)} risky frames).'
+            ),
+            'stream_id': stream.id,
+            'timestamp': timezone.now().isoformat(),
+        }
+    try:
+        _broadcast(
+            f'stream_{stream.id}',
+            {
+                'type': 'stream_update',
+                **encode_event({
+                    'stream_id': stream.id,
+                    'timestamp': timezone.now().isoformat(),
+                    'batch_size': len(scored),
+                    'analysis': {
+                        **latest,
+                        'risk_score': risk_score,
+                        'smoothed_people_count': smoothed_people,
+                        'smoothed_risk': smoothed_risk_flag,
+                    },
+                    'alert': alert,
+                })
+            }
+        )
+    except Exception as e:
+        logger.warning("WebSocket broadcast error: %s", e)
+    if alert is not None:
+        _broadcast_alert(stream.id, alert)
+    return len(scored)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def analyze_frame(request):
+    """Analyze a single frame from live stream"""
+    try:
+        stream_id = request.data.get('stream_id')
+        frame_data = request.data.get('frame_data')  # Base64 encoded image
+        frame_file = request.FILES.get('frame')  # or the raw encoded image as a multipart part
+        if frame_file is not None:
+            # Binary upload skips the base64 inflation and decode round trip
+            frame_data = frame_file.read()
         
-        return Response({
-            'analysis': analysis,
-            'processing_time': processing_time,
-            'stream_status': LiveStreamSerializer(stream).data
-        })
+        if not stream_id or not frame_data:
+            return Response({
+                'error': 'stream_id and frame_data are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Make sure this stream belongs to the current user
+        try:
+            stream = LiveStream.objects.select_related('user').get(id=stream_id, user=request.user)
+        except LiveStream.DoesNotExist:
+            return Response({'error': 'Live stream not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Hand the frame to an inference worker when a task queue is configured
+        if CELERY_ENABLED:
+            if isinstance(frame_data, bytes):
+                frame_data = base64.b64encode(frame_data).decode('ascii')
+            task = analyze_frame_task.delay(stream.id, frame_data, request.user.id)
+            return Response({'task_id': task.id, 'stream_id': stream.id},
+                            status=status.HTTP_202_ACCEPTED)
+
+        payload, status_code = _analyze_stream_frame(stream, frame_data)
+        return Response(payload, status=status_code)
         
     except Exception as e:
         return Response({
@@ -523,13 +816,9 @@ def analyze_frame(request):
 @permission_classes([IsAuthenticated])
 def get_analysis_results(request):
     """Get analysis results with filtering"""
-    results = AnalysisResult.objects.all()
-    
-    # Filter by user's content
-    user_media_uploads = MediaUpload.objects.filter(user=request.user)
-    user_streams = LiveStream.objects.filter(user=request.user)
-    results = results.filter(
-        Q(media_upload__in=user_media_uploads) | Q(live_stream__in=user_streams)
+    # Filter by user's content (joins on the owner instead of IN subqueries)
+    results = AnalysisResult.objects.filter(
+        Q(media_upload__user=request.user) | Q(live_stream__user=request.user)
     )
     
     # Filter by type
@@ -544,20 +833,15 @@ def get_analysis_results(request):
     if stampede_only == 'true':
         results = results.filter(is_stampede_risk=True)
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    page_size = int(request.GET.get('page_size', 20))
-    paginator = Paginator(results, page_size)
-    page_obj = paginator.get_page(page)
+    if wants_keyset(request):
+        keyset = KeysetPagination(ordering='-timestamp')
+        page_items = keyset.paginate_queryset(results, request)
+        return keyset.get_paginated_response(AnalysisResultSerializer(page_items, many=True).data)
     
-    return Response({
-        'results': AnalysisResultSerializer(page_obj.object_list, many=True).data,
-        'count': paginator.count,
-        'num_pages': paginator.num_pages,
-        'current_page': page,
-        'has_next': page_obj.has_next(),
-        'has_previous': page_obj.has_previous()
-    })
+    # Pagination
+    paginator = StandardPageNumberPagination(page_size=20)
+    page_items = paginator.paginate_queryset(results, request)
+    return paginator.get_paginated_response(AnalysisResultSerializer(page_items, many=True).data)
 
 
 @api_view(['GET'])
@@ -565,15 +849,11 @@ def get_analysis_results(request):
 def get_alerts(request):
     """Get alerts for user's content"""
     # Get alerts for user's analysis results and streams
-    user_media_uploads = MediaUpload.objects.filter(user=request.user)
-    user_streams = LiveStream.objects.filter(user=request.user)
-    user_analysis_results = AnalysisResult.objects.filter(
-        Q(media_upload__in=user_media_uploads) | Q(live_stream__in=user_streams)
-    )
-    
     alerts = Alert.objects.filter(
-        Q(analysis_result__in=user_analysis_results) | Q(live_stream__in=user_streams)
-    )
+        Q(analysis_result__media_upload__user=request.user)
+        | Q(analysis_result__live_stream__user=request.user)
+        | Q(live_stream__user=request.user)
+    ).select_related('acknowledged_by')
     
     # Filter by acknowledged status
     acknowledged = request.GET.get('acknowledged')
@@ -587,20 +867,15 @@ def get_alerts(request):
     if severity:
         alerts = alerts.filter(severity=severity)
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    page_size = int(request.GET.get('page_size', 20))
-    paginator = Paginator(alerts, page_size)
-    page_obj = paginator.get_page(page)
+    if wants_keyset(request):
+        keyset = KeysetPagination(ordering='-created_at')
+        page_items = keyset.paginate_queryset(alerts, request)
+        return keyset.get_paginated_response(AlertSerializer(page_items, many=True).data)
     
-    return Response({
-        'results': AlertSerializer(page_obj.object_list, many=True).data,
-        'count': paginator.count,
-        'num_pages': paginator.num_pages,
-        'current_page': page,
-        'has_next': page_obj.has_next(),
-        'has_previous': page_obj.has_previous()
-    })
+    # Pagination
+    paginator = StandardPageNumberPagination(page_size=20)
+    page_items = paginator.paginate_queryset(alerts, request)
+    return paginator.get_paginated_response(AlertSerializer(page_items, many=True).data)
 
 
 @api_view(['POST'])
@@ -608,22 +883,24 @@ def get_alerts(request):
 def acknowledge_alert(request, alert_id):
     """Acknowledge an alert"""
     try:
-        alert = Alert.objects.get(id=alert_id)
-        
-        # Check if user has permission to acknowledge this alert
-        user_media_uploads = MediaUpload.objects.filter(user=request.user)
-        user_streams = LiveStream.objects.filter(user=request.user)
-        user_analysis_results = AnalysisResult.objects.filter(
-            Q(media_upload__in=user_media_uploads) | Q(live_stream__in=user_streams)
-        )
-        
-        if not (alert.analysis_result in user_analysis_results or alert.live_stream in user_streams):
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        # Fetch the alert only if it belongs to one of the user's uploads or streams
+        try:
+            alert = Alert.objects.get(
+                Q(analysis_result__media_upload__user=request.user)
+                | Q(analysis_result__live_stream__user=request.user)
+                | Q(live_stream__user=request.user),
+                id=alert_id
+            )
+        except Alert.DoesNotExist:
+            if Alert.objects.filter(id=alert_id).exists():
+                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+            raise
         
         alert.acknowledged = True
         alert.acknowledged_by = request.user
         alert.acknowledged_at = timezone.now()
-        alert.save()
+        alert.save(update_fields=['acknowledged', 'acknowledged_by', 'acknowledged_at'])
+        cache.delete(ALERT_STATS_CACHE_KEY)
         
         return Response({
             'message': 'Alert acknowledged successfully',
@@ -641,62 +918,114 @@ def analyze_media_async(media_upload_id):
         media_upload.analysis_status = 'processing'
         media_upload.save()
         
-        print(f"🔍 Starting analysis for media upload {media_upload_id}: {media_upload.filename}")
+        logger.debug("Starting analysis for media upload %s: %s", media_upload_id, media_upload.filename)
         
         # Use the fixed AI predictor with comprehensive error handling
         start_time = time.time()
         try:
-            # Import the fixed predictor
-            from .ai_predictor_fixed import get_predictor
-            predictor = get_predictor()
-            analysis = predictor.predict_from_file(media_upload.file.path)
-            
-            print(f"✅ Analysis completed successfully: {analysis}")
-            
-            # Check if analysis was successful
-            if not analysis.get('success', True):
-                # Analysis failed but we have specific error information
-                media_upload.analysis_status = 'failed'
-                media_upload.analysis_result = analysis
-                media_upload.save()
-                
-                print(f"❌ Analysis failed with specific error: {analysis.get('error', 'Unknown error')}")
-                return  # Exit early, don't create analysis result
-                
+            analysis = get_predictor().predict_from_file(media_upload.file.path)
         except Exception as e:
-            print(f"🚨 Critical ML prediction error: {str(e)}")
-            print(f"📋 Traceback: {traceback.format_exc()}")
-            
-            # Create a detailed error analysis result
-            analysis = {
-                'success': False,
-                'error': 'AI system unavailable',
-                'detail': f'The AI analysis system encountered an error: {str(e)}. Using basic fallback analysis.',
-                'crowd_detected': False,
-                'confidence_score': 0.0,
-                'people_count': 0,
-                'is_stampede_risk': False,
-                'status_message': f"Analysis system error: {str(e)}",
-                'fallback_mode': True,
-                'error_type': type(e).__name__,
-                'processing_time': time.time() - start_time
-            }
+            logger.exception("Critical ML prediction error for media upload %s", media_upload_id)
+            analysis = _prediction_error_analysis(e, start_time)
+            raised = True
+        else:
+            raised = False
         
-        processing_time = time.time() - start_time
+        _store_media_analysis(media_upload, analysis, time.time() - start_time, raised)
         
-        # Always complete the analysis, even with errors
-        media_upload.analysis_status = 'completed'
-        media_upload.crowd_detected = analysis.get('crowd_detected', False)
-        media_upload.confidence_score = analysis.get('confidence_score', 0.0)
-        media_upload.people_count = analysis.get('people_count', 0)
-        media_upload.is_stampede_risk = analysis.get('is_stampede_risk', False)
-        media_upload.analysis_completed_at = timezone.now()
+    except Exception:
+        logger.exception("Critical error analyzing media %s", media_upload_id)
+        _mark_media_failed(media_upload_id)
+
+
+def analyze_media_batch_async(media_upload_ids):
+    """Analyze the uploads from one multi-file request with a single predict_many call"""
+    try:
+        uploads = list(MediaUpload.objects.filter(id__in=media_upload_ids).order_by('id'))
+        if not uploads:
+            return
+        MediaUpload.objects.filter(id__in=[u.id for u in uploads]).update(analysis_status='processing')
+        
+        logger.debug("Starting batch analysis for media uploads %s", media_upload_ids)
         
-        # Store the full analysis result as JSON
+        start_time = time.time()
+        try:
+            analyses = get_predictor().predict_many([u.file.path for u in uploads])
+        except Exception as e:
+            logger.exception("Critical ML prediction error for media uploads %s", media_upload_ids)
+            analyses = [_prediction_error_analysis(e, start_time)] * len(uploads)
+            raised = True
+        else:
+            raised = False
+        processing_time = (time.time() - start_time) / len(uploads)
+        
+    except Exception:
+        logger.exception("Critical error analyzing media %s", media_upload_ids)
+        for media_upload_id in media_upload_ids:
+            _mark_media_failed(media_upload_id)
+        return
+    
+    for media_upload, analysis in zip(uploads, analyses):
+        try:
+            _store_media_analysis(media_upload, analysis, processing_time, raised)
+        except Exception:
+            logger.exception("Critical error analyzing media %s", media_upload.id)
+            _mark_media_failed(media_upload.id)
+
+
+def _prediction_error_analysis(error, start_time):
+    """Analysis result recorded when the predictor itself raised"""
+    return {
+        'success': False,
+        'error': 'AI system unavailable',
+        'detail': f'The AI analysis system encountered an error: {str(error)}. Using basic fallback analysis.',
+        'crowd_detected': False,
+        'confidence_score': 0.0,
+        'people_count': 0,
+        'is_stampede_risk': False,
+        'status_message': f"Analysis system error: {str(error)}",
+        'fallback_mode': True,
+        'error_type': type(error).__name__,
+        'processing_time': time.time() - start_time
+    }
+
+
+def _store_media_analysis(media_upload, analysis, processing_time, raised=False):
+    """Save a predictor result on its upload, with the AnalysisResult row and any alert.
+
+    raised marks the stand-in result for a predictor exception, which is still
+    recorded as a completed analysis.
+    """
+    media_upload_id = media_upload.id
+    
+    # Check if analysis was successful
+    if not raised and not analysis.get('success', True):
+        # Analysis failed but we have specific error information
+        media_upload.analysis_status = 'failed'
         media_upload.analysis_result = analysis
         media_upload.save()
         
-        print(f"Media upload {media_upload_id} analysis completed successfully")
+        logger.warning("Analysis of media upload %s failed: %s",
+                       media_upload_id, analysis.get('error', 'Unknown error'))
+        return  # Exit early, don't create analysis result
+    
+    # Always complete the analysis, even with errors
+    media_upload.analysis_status = 'completed'
+    media_upload.crowd_detected = analysis.get('crowd_detected', False)
+    media_upload.confidence_score = analysis.get('confidence_score', 0.0)
+    media_upload.people_count = analysis.get('people_count', 0)
+    media_upload.is_stampede_risk = analysis.get('is_stampede_risk', False)
+    media_upload.analysis_completed_at = timezone.now()
+    
+    # Store the full analysis result as JSON
+    media_upload.analysis_result = analysis
+    
+    # Upload status, detailed result and any alert commit as one transaction
+    with transaction.atomic():
+        media_upload.save(update_fields=[
+            'analysis_status', 'crowd_detected', 'confidence_score', 'people_count',
+            'is_stampede_risk', 'analysis_completed_at', 'analysis_result',
+        ])
         
         # Save detailed analysis result
         analysis_result = AnalysisResult.objects.create(
@@ -722,30 +1051,67 @@ def analyze_media_async(media_upload_id):
                 message=alert_message,
                 analysis_result=analysis_result
             )
-            print(f"Stampede risk alert created for media upload {media_upload_id}")
-        
-    except Exception as e:
-        print(f"Critical error analyzing media {media_upload_id}: {str(e)}")
-        try:
-            media_upload = MediaUpload.objects.get(id=media_upload_id)
-            media_upload.analysis_status = 'failed'
-            media_upload.save()
-            print(f"Marked media upload {media_upload_id} as failed")
-        except Exception as save_error:
-            print(f"Failed to update media upload status: {str(save_error)}")
-            pass
+            logger.info("Stampede risk alert created for media upload %s", media_upload_id)
+            transaction.on_commit(lambda: cache.delete(ALERT_STATS_CACHE_KEY))
+
+
+def _mark_media_failed(media_upload_id):
+    try:
+        MediaUpload.objects.filter(id=media_upload_id).update(analysis_status='failed')
+    except Exception as save_error:
+        logger.error("Failed to mark media upload %s as failed: %s", media_upload_id, save_error)
+
+
+# Dashboard aggregates are shared by every poller for a short window; alert stats are
+# also dropped whenever an alert is created or acknowledged
+ANALYTICS_CACHE_TTL = 30
+ALERT_STATS_CACHE_KEY = 'alert_stats'
+ALERT_STATS_CACHE_TTL = 30
+
+# health_check results are reused for this many seconds
+HEALTH_CACHE_TTL = 5.0
+_health_cache = {}
+
+
+# Configuration part of the health report; settings and environment are fixed for
+# the life of the process, so they are read once
+_HEALTH_CONFIG_SNAPSHOT = {
+    'upload_config': {
+        "max_file_size": getattr(settings, 'MAX_UPLOAD_SIZE', 'not_set'),
+        "max_data_size": getattr(settings, 'DATA_UPLOAD_MAX_MEMORY_SIZE', 'not_set'),
+        "media_root": getattr(settings, 'MEDIA_ROOT', 'not_set'),
+    },
+    'cors_config': {
+        "allow_all_origins": getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False),
+        "allowed_origins": getattr(settings, 'CORS_ALLOWED_ORIGINS', []),
+        "allow_credentials": getattr(settings, 'CORS_ALLOW_CREDENTIALS', False),
+    },
+    'system_info': {
+        "debug_mode": settings.DEBUG,
+        "environment": os.environ.get('ENVIRONMENT', 'development'),
+        "python_version": f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
+    },
+}
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def liveness(request):
+    """Liveness probe: the process is serving requests. No DB or predictor access"""
+    return HttpResponse(b'{"status":"alive"}', content_type='application/json')
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def health_check(request):
     """Enhanced health check endpoint for deployment monitoring and debugging"""
+    # Monitors poll this every few seconds; reuse a recent healthy report
+    cached = _health_cache.get('payload')
+    if cached is not None and time.monotonic() - cached[0] < HEALTH_CACHE_TTL:
+        return Response({**cached[1], 'timestamp': timezone.now().isoformat()})
+
     try:
-        import os
-        from django.conf import settings
-        
         # Check database connection
-        from django.db import connection
         db_status = "connected"
         try:
             with connection.cursor() as cursor:
@@ -753,50 +1119,26 @@ def health_check(request):
         except Exception as db_error:
             db_status = f"error: {str(db_error)}"
         
-        # Check if ML predictor can be loaded (with fallback)
-        predictor_status = "available"
-        predictor_info = {}
-        try:
-            predictor = get_predictor()
-            if predictor is None:
-                predictor_status = "demo_mode"
-                predictor_info = {"mode": "demo", "reason": "ML model not available"}
-            else:
-                predictor_info = {"mode": "production", "model_loaded": True}
-        except Exception as pred_error:
-            predictor_status = "demo_mode"
-            predictor_info = {"mode": "demo", "error": str(pred_error)}
-        
-        # Check file upload configuration
-        upload_config = {
-            "max_file_size": getattr(settings, 'FILE_UPLOAD_MAX_MEMORY_SIZE', 'not_set'),
-            "max_data_size": getattr(settings, 'DATA_UPLOAD_MAX_MEMORY_SIZE', 'not_set'),
-            "media_root": getattr(settings, 'MEDIA_ROOT', 'not_set'),
-        }
-        
-        # Check CORS configuration
-        cors_config = {
-            "allow_all_origins": getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False),
-            "allowed_origins": getattr(settings, 'CORS_ALLOWED_ORIGINS', []),
-            "allow_credentials": getattr(settings, 'CORS_ALLOW_CREDENTIALS', False),
-        }
-        
-        # System information
-        system_info = {
-            "debug_mode": settings.DEBUG,
-            "environment": os.environ.get('ENVIRONMENT', 'development'),
-            "python_version": f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
-        }
+        # Report on the ML predictor without loading it: a probe must never be the
+        # request that pays for model start-up (ApiConfig.ready preloads it)
+        predictor = loaded_predictor()
+        if predictor is None:
+            predictor_status = "not_loaded"
+            predictor_info = {"mode": "lazy", "reason": "loads on the first analysis request"}
+        else:
+            predictor_status = "available"
+            predictor_info = {
+                "mode": "production" if predictor.model_loaded else "fallback",
+                "model_loaded": predictor.model_loaded,
+            }
         
-        return Response({
+        payload = {
             'status': 'healthy',
             'timestamp': timezone.now().isoformat(),
             'database': db_status,
             'ml_predictor': predictor_status,
             'predictor_info': predictor_info,
-            'upload_config': upload_config,
-            'cors_config': cors_config,
-            'system_info': system_info,
+            **_HEALTH_CONFIG_SNAPSHOT,
             'version': '1.0.0',
             'endpoints': {
                 'auth': '/api/auth/',
@@ -804,7 +1146,9 @@ def health_check(request):
                 'analysis': '/api/analysis/',
                 'health': '/api/health/'
             }
-        }, status=status.HTTP_200_OK)
+        }
+        _health_cache['payload'] = (time.monotonic(), payload)
+        return Response(payload, status=status.HTTP_200_OK)
     
     except Exception as e:
         return Response({
@@ -858,8 +1202,14 @@ def get_analytics(request):
     try:
         time_range = request.GET.get('time_range', '24h')
         
+        # Dashboards poll this; the payload is the same for every caller, so polls
+        # within ANALYTICS_CACHE_TTL share one set of aggregate queries
+        cache_key = f'analytics:{time_range}' if time_range in ('1h', '24h', '7d', '30d') else None
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
+        
         # Calculate time filter based on range
-        from datetime import datetime, timedelta
         now = timezone.now()
         
         if time_range == '1h':
@@ -878,34 +1228,48 @@ def get_analytics(request):
             timestamp__gte=start_time
         ).order_by('-timestamp')
         
-        # Calculate statistics
-        total_analyses = results.count()
-        high_risk_count = results.filter(is_stampede_risk=True).count()
-        avg_people_count = results.aggregate(
-            avg_count=Avg('people_count')
-        )['avg_count'] or 0
+        # Calculate statistics: long ranges from the hourly rollups when enabled,
+        # otherwise in a single pass over the raw rows
+        if settings.ANALYTICS_USE_ROLLUP and time_range in ('7d', '30d'):
+            total_analyses, high_risk_count, avg_people_count = rollups.summarize(start_time, now)
+        else:
+            summary = results.aggregate(
+                total=Count('id'),
+                high_risk=Count('id', filter=Q(is_stampede_risk=True)),
+                avg_people=Coalesce(Avg('people_count'), 0.0, output_field=FloatField()),
+            )
+            total_analyses = summary['total']
+            high_risk_count = summary['high_risk']
+            avg_people_count = summary['avg_people']
         
-        # Get hourly breakdown for charts
-        hourly_data = []
-        for i in range(24):
-            hour_start = now - timedelta(hours=i+1)
-            hour_end = now - timedelta(hours=i)
-            
-            hour_results = results.filter(
-                timestamp__gte=hour_start,
-                timestamp__lt=hour_end
+        # Get hourly breakdown for charts: the last 24 clock hours, bucketed by the
+        # database in one GROUP BY; hours with no rows are filled in below
+        current_hour = timezone.localtime(now).replace(minute=0, second=0, microsecond=0)
+        first_hour = current_hour - timedelta(hours=23)
+        buckets = {
+            row['hour']: row
+            for row in results.filter(timestamp__gte=first_hour)
+            .order_by()
+            .annotate(hour=TruncHour('timestamp'))
+            .values('hour')
+            .annotate(
+                analyses=Count('id'),
+                high_risk=Count('id', filter=Q(is_stampede_risk=True)),
+                avg_people=Coalesce(Avg('people_count'), 0.0, output_field=FloatField()),
             )
-            
+        }
+        hourly_data = []
+        for i in range(23, -1, -1):
+            hour_start = current_hour - timedelta(hours=i)
+            row = buckets.get(hour_start)
             hourly_data.append({
                 'hour': hour_start.strftime('%H:00'),
-                'analyses': hour_results.count(),
-                'high_risk': hour_results.filter(is_stampede_risk=True).count(),
-                'avg_people': hour_results.aggregate(
-                    avg=Avg('people_count')
-                )['avg'] or 0
+                'analyses': row['analyses'] if row else 0,
+                'high_risk': row['high_risk'] if row else 0,
+                'avg_people': row['avg_people'] if row else 0
             })
         
-        return Response({
+        payload = {
             'time_range': time_range,
             'summary': {
                 'total_analyses': total_analyses,
@@ -913,11 +1277,14 @@ def get_analytics(request):
                 'average_people_count': round(avg_people_count, 1),
                 'risk_percentage': round((high_risk_count / total_analyses * 100) if total_analyses > 0 else 0, 1)
             },
-            'hourly_data': list(reversed(hourly_data)),  # Most recent first
+            'hourly_data': hourly_data,  # Oldest hour first
             'recent_analyses': AnalysisResultSerializer(
                 results[:10], many=True
             ).data
-        }, status=status.HTTP_200_OK)
+        }
+        if cache_key:
+            cache.set(cache_key, payload, ANALYTICS_CACHE_TTL)
+        return Response(payload, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response({
@@ -931,26 +1298,30 @@ def get_analytics(request):
 @permission_classes([IsAuthenticated])
 def get_alert_stats(request):
     """Get alert statistics and summary"""
+    cached = cache.get(ALERT_STATS_CACHE_KEY)
+    if cached is not None:
+        return Response(cached, status=status.HTTP_200_OK)
     try:
-        # Get all alerts
-        all_alerts = Alert.objects.all()
-        
-        # Calculate statistics
-        total_alerts = all_alerts.count()
-        active_alerts = all_alerts.filter(acknowledged=False).count()
-        acknowledged_alerts = all_alerts.filter(acknowledged=True).count()
-        
-        # Get alerts by severity
-        high_severity = all_alerts.filter(severity='high').count()
-        medium_severity = all_alerts.filter(severity='medium').count()
-        low_severity = all_alerts.filter(severity='low').count()
-        
-        # Get recent alerts (last 24 hours)
-        from datetime import timedelta
+        # All counts (totals, by severity, last 24 hours) in one pass over the table
         recent_time = timezone.now() - timedelta(hours=24)
-        recent_alerts = all_alerts.filter(created_at__gte=recent_time).count()
+        stats = Alert.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(acknowledged=False)),
+            acknowledged=Count('id', filter=Q(acknowledged=True)),
+            high=Count('id', filter=Q(severity='high')),
+            medium=Count('id', filter=Q(severity='medium')),
+            low=Count('id', filter=Q(severity='low')),
+            recent=Count('id', filter=Q(created_at__gte=recent_time)),
+        )
+        total_alerts = stats['total']
+        active_alerts = stats['active']
+        acknowledged_alerts = stats['acknowledged']
+        high_severity = stats['high']
+        medium_severity = stats['medium']
+        low_severity = stats['low']
+        recent_alerts = stats['recent']
         
-        return Response({
+        payload = {
             'summary': {
                 'total_alerts': total_alerts,
                 'active_alerts': active_alerts,
@@ -965,7 +1336,9 @@ def get_alert_stats(request):
             'acknowledgment_rate': round(
                 (acknowledged_alerts / total_alerts * 100) if total_alerts > 0 else 0, 1
             )
-        }, status=status.HTTP_200_OK)
+        }
+        cache.set(ALERT_STATS_CACHE_KEY, payload, ALERT_STATS_CACHE_TTL)
+        return Response(payload, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response({
@@ -0,0 +1,6 @@
+try:
+    # Load the Celery app with Django so @shared_task binds to it (Celery is optional)
+    from .celery import app as celery_app
+    __all__ = ('celery_app',)
+except ImportError:
+    pass
@@ -4,14 +4,19 @@ ASGI config for crowdcontrol project.
 
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crowdcontrol.settings')
+
+# Set up Django before anything imports models: this runs ApiConfig.ready(), which
+# loads and warms the predictor at process start rather than on the first frame
+django_asgi_app = get_asgi_application()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import api.routing
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crowdcontrol.settings')
-
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(
             api.routing.websocket_urlpatterns
@@ -0,0 +1,16 @@
+"""
+Celery app for crowdcontrol: frame inference and media analysis workers.
+
+Run with e.g. `celery -A crowdcontrol worker -Q gpu_inference` and
+`celery -A crowdcontrol worker -Q cpu_media`.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crowdcontrol.settings')
+
+app = Celery('crowdcontrol')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,42 @@
+"""
+Logging setup: the LOGGING dict is applied as usual, then every configured handler
+is moved behind a QueueHandler so request threads only enqueue records and a
+single listener thread does the blocking console/file writes.
+"""
+
+import atexit
+import logging
+import logging.config
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_listener = None
+
+
+def configure(logging_settings):
+    """LOGGING_CONFIG callable; takes the same dict as logging.config.dictConfig"""
+    global _listener
+    logging.config.dictConfig(logging_settings)
+
+    names = [None] + list(logging_settings.get('loggers', {}))
+    loggers = [logging.getLogger(name) for name in names]
+    targets = []
+    for lg in loggers:
+        for handler in lg.handlers:
+            if handler not in targets:
+                targets.append(handler)
+    if not targets:
+        return
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    for lg in loggers:
+        if lg.handlers:
+            lg.handlers = [queue_handler]
+
+    # Each target keeps its own level, so console/file filtering is unchanged
+    _listener = QueueListener(log_queue, *targets, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -3,8 +3,10 @@ Django settings for crowdcontrol project.
 """
 
 from pathlib import Path
+import importlib.util
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -72,7 +74,13 @@ ASGI_APPLICATION = 'crowdcontrol.asgi.application'
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(default=DATABASE_URL)
+        # Persistent connections are opt-in: they pay off under WSGI (gunicorn, see the
+        # Dockerfile) but pile up per thread under ASGI (daphne on Render), so keep 0 there
+        'default': dj_database_url.config(
+            default=DATABASE_URL,
+            conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+            conn_health_checks=True,
+        )
     }
 else:
     # Use SQLite for development (easier setup)
@@ -131,13 +139,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with the resolved User cached (api/authentication.py)
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # orjson-backed when orjson is installed, DRF's JSONRenderer otherwise
+        'api.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -212,9 +222,7 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
-# File Upload Configuration - FIXED for 100MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
+# File Upload Configuration - 100MB uploads (limits set under "File upload settings" below)
 FILE_UPLOAD_PERMISSIONS = 0o644
 
 # Media files configuration
@@ -227,15 +235,73 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Channels configuration for WebSocket (in-memory for development)
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
+# Optional Redis; when set (and redis-py is installed) live-stream smoothing windows
+# are shared across workers instead of kept per process
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+# Shared cache (JWT user lookups, list counts) in Redis when available, per process otherwise
+if REDIS_URL and importlib.util.find_spec('redis') is not None:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Celery (optional): set CELERY_BROKER_URL to move frame inference and media analysis
+# off the web workers; analyze_frame then answers 202 and results arrive over WebSocket
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', '')
+
+# Group sends must reach other processes (web workers, Celery workers) once REDIS_URL
+# is set; the in-memory layer only delivers within a single process
+if REDIS_URL and importlib.util.find_spec('channels_redis') is not None:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+elif CELERY_BROKER_URL:
+    # Worker results would be broadcast into a layer no WebSocket client is attached to
+    raise ImproperlyConfigured(
+        'CELERY_BROKER_URL requires a shared channel layer: set REDIS_URL and install channels-redis'
+    )
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Tasks report back over the channel layer, so no result backend unless one is asked for
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or None
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_TASK_ROUTES = {
+    'api.analyze_frame_task': {'queue': 'gpu_inference'},
+    'api.analyze_media_task': {'queue': 'cpu_media'},
+}
+# Inference tasks are long: one at a time per worker process, acked only once done so a
+# crashed worker's upload is redelivered. Size the pool to the predictor slots available
+CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', '2'))
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+CELERY_BEAT_SCHEDULE = {
+    'rollup-analytics': {'task': 'api.rollup_analytics_task', 'schedule': 300.0},
 }
 
+# Serve 7d/30d analytics summaries from the AnalysisResultHourly rollup table. Only
+# enable once rollups are refreshed: Celery beat above, or cron running
+# `manage.py rollup_analytics` every few minutes (backfill first with --hours 720)
+ANALYTICS_USE_ROLLUP = os.environ.get('ANALYTICS_USE_ROLLUP', 'False').lower() == 'true'
+
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
+# Uploads above 2MB are streamed to a temp file instead of held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024  # 2MB
+# Non-file body size (form fields / JSON, e.g. base64 frames); files aren't counted
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+# Hard cap on a media upload, checked against Content-Length before the body is parsed
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_FILE_SIZE', 100 * 1024 * 1024))  # 100MB
 
 # Additional upload settings
 FILE_UPLOAD_PERMISSIONS = 0o644
@@ -244,8 +310,21 @@ FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 # ML Model settings
 ML_MODEL_PATH = os.environ.get('ML_MODEL_PATH', os.path.join(BASE_DIR.parent, 'stampede_model.ckpt'))
 HAAR_CASCADE_PATH = os.environ.get('HAAR_CASCADE_PATH', os.path.join(BASE_DIR.parent, 'haarcascade_frontalface_default.xml'))
+# Build and warm up the predictor when a server process starts instead of on the first request
+ML_PRELOAD = os.environ.get('ML_PRELOAD', 'True').lower() == 'true'
+# Serve the legacy model through the int8 TFLite interpreter; False keeps the FP32 graph
+ML_USE_TFLITE = os.environ.get('ML_USE_TFLITE', 'True').lower() == 'true'
+# LBP cascade is preferred when present (integer features, much faster than Haar)
+LBP_CASCADE_PATH = os.environ.get('LBP_CASCADE_PATH', os.path.join(BASE_DIR.parent, 'lbpcascade_frontalface_improved.xml'))
+# OpenCV DNN (Res10 SSD) face detector; used instead of the cascades when both files exist
+FACE_DNN_PROTO_PATH = os.environ.get('FACE_DNN_PROTO_PATH', os.path.join(BASE_DIR.parent, 'deploy.prototxt'))
+FACE_DNN_MODEL_PATH = os.environ.get('FACE_DNN_MODEL_PATH', os.path.join(BASE_DIR.parent, 'res10_300x300_ssd_iter_140000.caffemodel'))
+FACE_DNN_CONFIDENCE = float(os.environ.get('FACE_DNN_CONFIDENCE', '0.5'))
 
 # Logging configuration
+# Handlers below are fed from a queue by a background listener thread
+LOGGING_CONFIG = 'crowdcontrol.log_config.configure'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
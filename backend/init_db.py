@@ -21,15 +21,16 @@ from api.models import MediaUpload, LiveStream, AnalysisResult, Alert
 def create_superuser():
     """Create a superuser if it doesn't exist"""
     try:
-        if not User.objects.filter(username='admin').exists():
-            User.objects.create_superuser(
-                username='admin',
-                email='admin@crowdcontrol.com',
-                password='admin123'  # Change this in production!
-            )
-            print("✅ Superuser 'admin' created successfully")
-        else:
-            print("ℹ️  Superuser 'admin' already exists")
+        with transaction.atomic():
+            if not User.objects.filter(username='admin').exists():
+                User.objects.create_superuser(
+                    username='admin',
+                    email='admin@crowdcontrol.com',
+                    password='admin123'  # Change this in production!
+                )
+                print("✅ Superuser 'admin' created successfully")
+            else:
+                print("ℹ️  Superuser 'admin' already exists")
     except Exception as e:
         print(f"❌ Error creating superuser: {e}")
 
@@ -37,17 +38,18 @@ def create_superuser():
 def create_demo_user():
     """Create a demo user for testing"""
     try:
-        if not User.objects.filter(username='demo').exists():
-            User.objects.create_user(
-                username='demo',
-                email='demo@crowdcontrol.com',
-                password='demo123',
-                first_name='Demo',
-                last_name='User'
-            )
-            print("✅ Demo user created successfully")
-        else:
-            print("ℹ️  Demo user already exists")
+        with transaction.atomic():
+            if not User.objects.filter(username='demo').exists():
+                User.objects.create_user(
+                    username='demo',
+                    email='demo@crowdcontrol.com',
+                    password='demo123',
+                    first_name='Demo',
+                    last_name='User'
+                )
+                print("✅ Demo user created successfully")
+            else:
+                print("ℹ️  Demo user already exists")
     except Exception as e:
         print(f"❌ Error creating demo user: {e}")
 
@@ -70,19 +72,20 @@ def setup_database():
 def create_sample_data():
     """Create sample data for demonstration"""
     try:
-        demo_user = User.objects.get(username='demo')
+        with transaction.atomic():
+            demo_user = User.objects.only('id').get(username='demo')
         
-        # Create sample live stream
-        if not LiveStream.objects.filter(user=demo_user).exists():
-            LiveStream.objects.create(
-                user=demo_user,
-                stream_name="Demo Live Stream",
-                stream_url="rtmp://demo.stream.url",
-                status="inactive"
-            )
-            print("✅ Sample live stream created")
+            # Create sample live stream
+            if not LiveStream.objects.filter(user=demo_user).exists():
+                LiveStream.objects.create(
+                    user=demo_user,
+                    stream_name="Demo Live Stream",
+                    stream_url="rtmp://demo.stream.url",
+                    status="inactive"
+                )
+                print("✅ Sample live stream created")
         
-        print("✅ Sample data created successfully")
+            print("✅ Sample data created successfully")
         
     except Exception as e:
         print(f"❌ Error creating sample data: {e}")
@@ -96,12 +99,12 @@ def main():
     # Setup database
     setup_database()
     
-    # Create users
-    create_superuser()
-    create_demo_user()
-    
-    # Create sample data
-    create_sample_data()
+    # Create users and sample data, committed together; each step runs in its own
+    # savepoint so a failed one rolls back alone instead of poisoning the rest
+    with transaction.atomic():
+        create_superuser()
+        create_demo_user()
+        create_sample_data()
     
     print("=" * 50)
     print("✅ Database initialization completed!")
@@ -7,6 +7,7 @@ This script automatically diagnoses and fixes the most common causes of blank wh
 in the CrowdControl Vite-based React frontend.
 """
 
+import functools
 import os
 import json
 import shutil
@@ -47,6 +48,34 @@ def run_command(command, capture_output=True):
     except Exception as e:
         return False, "", str(e)
 
+@functools.lru_cache(maxsize=None)
+def _tool_version(tool):
+    """Output of `<tool> --version`, or None if unavailable; each tool is run at most once.
+    Resolved with shutil.which and run without a shell (no cmd.exe start-up on Windows)."""
+    exe = shutil.which(tool)
+    if exe is None:
+        return None
+    try:
+        result = subprocess.run([exe, "--version"], capture_output=True, text=True)
+    except Exception:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def _installed_packages():
+    """Names of packages under node_modules from one directory scan (plus one per @scope dir)."""
+    installed = set()
+    try:
+        with os.scandir("node_modules") as it:
+            for entry in it:
+                if entry.name.startswith("@") and entry.is_dir():
+                    with os.scandir(entry.path) as scoped:
+                        installed.update(f"{entry.name}/{e.name}" for e in scoped)
+                else:
+                    installed.add(entry.name)
+    except FileNotFoundError:
+        pass
+    return installed
+
 def check_environment():
     """Check if we're in the right directory and environment is set up"""
     print_step(1, "Checking Environment")
@@ -63,17 +92,17 @@ def check_environment():
     print_success("Found package.json - in frontend directory")
     
     # Check Node.js
-    success, stdout, stderr = run_command("node --version")
-    if success:
-        print_success(f"Node.js version: {stdout.strip()}")
+    node_version = _tool_version("node")
+    if node_version:
+        print_success(f"Node.js version: {node_version}")
     else:
         print_error("Node.js not found! Please install Node.js")
         return False
     
     # Check npm
-    success, stdout, stderr = run_command("npm --version")
-    if success:
-        print_success(f"npm version: {stdout.strip()}")
+    npm_version = _tool_version("npm")
+    if npm_version:
+        print_success(f"npm version: {npm_version}")
     else:
         print_error("npm not found!")
         return False
@@ -91,15 +120,16 @@ def backup_critical_files():
     ]
     
     for file_path in files_to_backup:
-        if os.path.exists(file_path):
-            backup_path = f"{file_path}.backup"
-            if not os.path.exists(backup_path):
-                shutil.copy2(file_path, backup_path)
-                print_success(f"Backed up {file_path}")
-            else:
-                print_info(f"Backup already exists: {backup_path}")
-        else:
+        backup_path = f"{file_path}.backup"
+        # Exclusive create instead of exists() checks; contents only, no metadata copy
+        try:
+            with open(file_path, "rb") as src, open(backup_path, "xb") as dst:
+                shutil.copyfileobj(src, dst)
+            print_success(f"Backed up {file_path}")
+        except FileNotFoundError:
             print_warning(f"File not found: {file_path}")
+        except FileExistsError:
+            print_info(f"Backup already exists: {backup_path}")
 
 def fix_node_modules():
     """Fix node_modules issues"""
@@ -118,11 +148,8 @@ def fix_node_modules():
     
     # Check critical packages
     critical_packages = ["react", "react-dom", "vite", "@vitejs/plugin-react"]
-    missing_packages = []
-    
-    for package in critical_packages:
-        if not os.path.exists(f"node_modules/{package}"):
-            missing_packages.append(package)
+    installed = _installed_packages()
+    missing_packages = [p for p in critical_packages if p not in installed]
     
     if missing_packages:
         print_warning(f"Missing packages: {missing_packages}")
@@ -238,6 +265,19 @@ def apply_safe_appcontext():
     else:
         print_info("Original AppContext not found, skipping")
 
+_PLACEHOLDER_TPL = '''import React from 'react';
+
+function {name}({{ children, ...props }}) {{
+  return (
+    <div {{...props}}>
+      <div>Loading {name}...</div>
+      {{children}}
+    </div>
+  );
+}}
+
+export default {name};'''
+
 def fix_common_import_issues():
     """Fix common import path issues"""
     print_step(6, "Checking Import Issues")
@@ -262,24 +302,10 @@ def fix_common_import_issues():
         ("src/components/layout/MainLayout.jsx", "MainLayout")
     ]
     
+    # Parent dirs were all created above, so each placeholder is a single write
     for file_path, component_name in placeholder_components:
         if not os.path.exists(file_path):
-            placeholder_content = f'''import React from 'react';
-
-function {component_name}({{ children, ...props }}) {{
-  return (
-    <div {{...props}}>
-      <div>Loading {component_name}...</div>
-      {{children}}
-    </div>
-  );
-}}
-
-export default {component_name};'''
-            
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w") as f:
-                f.write(placeholder_content)
+            Path(file_path).write_text(_PLACEHOLDER_TPL.format(name=component_name))
             print_success(f"Created placeholder: {file_path}")
 
 def test_minimal_app():
@@ -314,10 +340,10 @@ def restore_original_files():
     choice = input("Enter choice (1-3): ").strip()
     
     if choice == "1":
-        if os.path.exists("src/main.jsx.original"):
-            shutil.copy2("src/main.jsx.original", "src/main.jsx")
+        try:
+            shutil.copyfile("src/main.jsx.original", "src/main.jsx")
             print_success("Restored original main.jsx")
-        else:
+        except FileNotFoundError:
             print_warning("No original main.jsx backup found")
     
     elif choice == "3":
@@ -328,9 +354,11 @@ def restore_original_files():
         ]
         
         for backup_path, original_path in backup_files:
-            if os.path.exists(backup_path):
-                shutil.copy2(backup_path, original_path)
+            try:
+                shutil.copyfile(backup_path, original_path)
                 print_success(f"Restored {original_path}")
+            except FileNotFoundError:
+                pass
 
 def generate_report():
     """Generate a diagnostic report"""
@@ -340,14 +368,14 @@ def generate_report():
     print(f"   Working Directory: {os.getcwd()}")
     
     # Node.js version
-    success, stdout, stderr = run_command("node --version")
-    if success:
-        print(f"   Node.js: {stdout.strip()}")
+    node_version = _tool_version("node")
+    if node_version:
+        print(f"   Node.js: {node_version}")
     
     # npm version
-    success, stdout, stderr = run_command("npm --version")
-    if success:
-        print(f"   npm: {stdout.strip()}")
+    npm_version = _tool_version("npm")
+    if npm_version:
+        print(f"   npm: {npm_version}")
     
     print("\n📁 File Status:")
     critical_files = [
@@ -359,16 +387,26 @@ def generate_report():
         "src/index.css"
     ]
     
+    # One scan per directory instead of a stat per file
+    present = {}
     for file_path in critical_files:
-        status = "✅ EXISTS" if os.path.exists(file_path) else "❌ MISSING"
+        parent, name = os.path.split(file_path)
+        if parent not in present:
+            try:
+                with os.scandir(parent or ".") as it:
+                    present[parent] = {e.name for e in it}
+            except FileNotFoundError:
+                present[parent] = set()
+        status = "✅ EXISTS" if name in present[parent] else "❌ MISSING"
         print(f"   {file_path}: {status}")
     
     print("\n📦 Dependencies:")
-    if os.path.exists("node_modules"):
+    if "node_modules" in present[""]:
         print("   node_modules: ✅ EXISTS")
+        installed = _installed_packages()
         critical_packages = ["react", "react-dom", "vite"]
         for package in critical_packages:
-            status = "✅" if os.path.exists(f"node_modules/{package}") else "❌"
+            status = "✅" if package in installed else "❌"
             print(f"   {package}: {status}")
     else:
         print("   node_modules: ❌ MISSING")
@@ -7,39 +7,105 @@ This script helps diagnose and fix the blank white page issue in your Vite-based
 It performs comprehensive checks and provides step-by-step debugging guidance.
 """
 
+import bisect
+import functools
 import os
 import json
+import re
 import subprocess
 import sys
+import traceback
 from pathlib import Path
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    # json.loads accepts bytes too; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _json_loads = json.loads
+
 def print_header(title):
     print(f"\n{'='*60}")
     print(f"🔍 {title}")
     print(f"{'='*60}")
 
+def _safe(check):
+    """Turn an unexpected error in a check into a failed result, with the traceback on stderr."""
+    @functools.wraps(check)
+    def wrapper():
+        try:
+            return check()
+        except Exception as e:
+            print(f"❌ Check failed with error: {e}")
+            traceback.print_exc()
+            return False
+    return wrapper
+
 def print_step(step, description):
     print(f"\n📋 Step {step}: {description}")
     print("-" * 50)
 
+_CRITICAL_DEPS = frozenset({'react', 'react-dom', 'vite'})
+
+# Relative component/context/service imports, matched over the whole file in one pass
+_IMPORT_RE = re.compile(
+    r"""^[ \t]*import\s.*?\bfrom\s+['"](\./(?:components|contexts|services)/[^'"]+)['"]""",
+    re.MULTILINE,
+)
+
+@functools.lru_cache(maxsize=4096)
+def _stat(path):
+    """Memoized os.stat (None if missing); the same files are probed by several checks.
+    Paths are relative to the frontend dir, which main() enters before any check runs."""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def _exists(path):
+    return _stat(path) is not None
+
+@functools.lru_cache(maxsize=256)
+def _dir_entries(path):
+    """Names in a directory, listed once per run (empty if it does not exist)."""
+    try:
+        return frozenset(os.listdir(path))
+    except OSError:
+        return frozenset()
+
+def _module_exists(actual_path):
+    """Whether an extensionless import resolves to .jsx/.js or a directory index.jsx/index.js.
+    Sibling imports share one listing of their parent directory instead of four stats each."""
+    parent, stem = os.path.split(actual_path)
+    entries = _dir_entries(parent)
+    if stem + '.jsx' in entries or stem + '.js' in entries:
+        return True
+    return stem in entries and not _dir_entries(actual_path).isdisjoint(('index.jsx', 'index.js'))
+
 def check_file_exists(file_path, description):
     """Check if a file exists and report status"""
-    if os.path.exists(file_path):
+    if _exists(file_path):
         print(f"✅ {description}: EXISTS")
         return True
     else:
         print(f"❌ {description}: MISSING")
         return False
 
+@functools.lru_cache(maxsize=64)
+def _read_cached(path):
+    """File contents, read at most once per run (the script never edits the files it checks)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 def read_file_safely(file_path):
     """Safely read a file and return its content"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return _read_cached(file_path)
     except Exception as e:
         print(f"❌ Error reading {file_path}: {e}")
         return None
 
+@_safe
 def check_package_json():
     """Check package.json for issues"""
     print_step(1, "Checking package.json and dependencies")
@@ -49,8 +115,7 @@ def check_package_json():
         return False
     
     try:
-        with open(package_path, 'r') as f:
-            package_data = json.load(f)
+        package_data = _json_loads(Path(package_path).read_bytes())
         
         print("✅ package.json is valid JSON")
         
@@ -58,15 +123,10 @@ def check_package_json():
         deps = package_data.get('dependencies', {})
         dev_deps = package_data.get('devDependencies', {})
         
-        critical_deps = ['react', 'react-dom', 'vite']
-        missing_deps = []
-        
-        for dep in critical_deps:
-            if dep not in deps and dep not in dev_deps:
-                missing_deps.append(dep)
+        missing_deps = _CRITICAL_DEPS - (deps.keys() | dev_deps.keys())
         
         if missing_deps:
-            print(f"❌ Missing critical dependencies: {missing_deps}")
+            print(f"❌ Missing critical dependencies: {sorted(missing_deps)}")
             return False
         else:
             print("✅ All critical dependencies present")
@@ -80,6 +140,7 @@ def check_package_json():
         print(f"❌ Error checking package.json: {e}")
         return False
 
+@_safe
 def check_vite_config():
     """Check Vite configuration"""
     print_step(2, "Checking Vite configuration")
@@ -99,6 +160,7 @@ def check_vite_config():
     
     return False
 
+@_safe
 def check_entry_files():
     """Check main entry files"""
     print_step(3, "Checking entry files")
@@ -126,33 +188,23 @@ def check_imports_in_file(file_path, file_description):
         return False
     
     # Look for common import patterns that might fail
-    lines = content.split('\n')
     import_issues = []
+    base_dir = os.path.dirname(file_path)
+    line_starts = None
     
-    for i, line in enumerate(lines, 1):
-        line = line.strip()
-        if line.startswith('import '):
-            # Check for relative imports that might not exist
-            if './components/' in line or './contexts/' in line or './services/' in line:
-                # Extract the import path
-                if 'from ' in line:
-                    import_path = line.split('from ')[-1].strip().strip("';\"")
-                    if import_path.startswith('./'):
-                        # Convert to actual file path
-                        base_dir = os.path.dirname(file_path)
-                        actual_path = os.path.join(base_dir, import_path.replace('./', ''))
-                        
-                        # Check common extensions
-                        possible_paths = [
-                            actual_path + '.jsx',
-                            actual_path + '.js',
-                            actual_path + '/index.jsx',
-                            actual_path + '/index.js'
-                        ]
-                        
-                        exists = any(os.path.exists(p) for p in possible_paths)
-                        if not exists:
-                            import_issues.append(f"Line {i}: {line} - File may not exist")
+    for match in _IMPORT_RE.finditer(content):
+        import_path = match.group(1)
+        # Convert to actual file path
+        actual_path = os.path.join(base_dir, import_path.replace('./', ''))
+        
+        if not _module_exists(actual_path):
+            # Line numbers are only needed for the report, so index them lazily
+            if line_starts is None:
+                line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+            i = bisect.bisect_right(line_starts, match.start())
+            line_end = content.find('\n', match.start())
+            line = content[line_starts[i - 1]:line_end if line_end != -1 else None].strip()
+            import_issues.append(f"Line {i}: {line} - File may not exist")
     
     if import_issues:
         print("❌ Potential import issues found:")
@@ -163,6 +215,7 @@ def check_imports_in_file(file_path, file_description):
         print("✅ No obvious import issues detected")
         return True
 
+@_safe
 def check_main_components():
     """Check main React components for issues"""
     print_step(4, "Checking main React components")
@@ -176,36 +229,46 @@ def check_main_components():
     
     all_good = True
     for file_path, description in components_to_check:
-        if os.path.exists(file_path):
-            if not check_imports_in_file(file_path, description):
-                all_good = False
-        else:
+        # Open directly instead of stat-then-open; the contents stay cached for the import scan
+        try:
+            _read_cached(file_path)
+        except FileNotFoundError:
             print(f"❌ {description} missing: {file_path}")
             all_good = False
+            continue
+        except Exception:
+            pass  # unreadable: read_file_safely reports it below
+        if not check_imports_in_file(file_path, description):
+            all_good = False
     
     return all_good
 
+@_safe
 def check_node_modules():
     """Check if node_modules is properly installed"""
     print_step(5, "Checking node_modules installation")
     
-    if not os.path.exists("node_modules"):
+    # One directory read (plus one per @scope dir) instead of a stat per package
+    try:
+        with os.scandir("node_modules") as it:
+            entries = {e.name for e in it}
+    except FileNotFoundError:
         print("❌ node_modules directory missing")
         print("💡 Run: npm install")
         return False
     
-    # Check for critical packages
-    critical_packages = [
-        "node_modules/react",
-        "node_modules/react-dom", 
-        "node_modules/vite",
-        "node_modules/@vitejs/plugin-react"
-    ]
+    def installed(package):
+        scope, _, name = package.rpartition("/")
+        if not scope:
+            return package in entries
+        if scope not in entries:
+            return False
+        with os.scandir(os.path.join("node_modules", scope)) as it:
+            return any(e.name == name for e in it)
     
-    missing_packages = []
-    for package in critical_packages:
-        if not os.path.exists(package):
-            missing_packages.append(package.replace("node_modules/", ""))
+    # Check for critical packages
+    critical_packages = ["react", "react-dom", "vite", "@vitejs/plugin-react"]
+    missing_packages = [p for p in critical_packages if not installed(p)]
     
     if missing_packages:
         print(f"❌ Missing packages: {missing_packages}")
@@ -215,6 +278,7 @@ def check_node_modules():
         print("✅ Critical packages installed")
         return True
 
+@_safe
 def create_minimal_test():
     """Create a minimal test to isolate the issue"""
     print_step(6, "Creating minimal test setup")
@@ -238,15 +302,17 @@ try {
 }
 '''
     
-    # Backup original main.jsx
-    if os.path.exists("src/main.jsx"):
-        with open("src/main.jsx.backup", 'w') as f:
-            f.write(read_file_safely("src/main.jsx"))
+    # One listing of src/ instead of probing each path
+    src_dir = Path("src")
+    existing = {p.name for p in src_dir.iterdir()}
+    
+    # Backup original main.jsx (an existing backup is kept; it may predate a swapped-in minimal main)
+    if "main.jsx" in existing and "main.jsx.backup" not in existing:
+        (src_dir / "main.jsx.backup").write_text(read_file_safely("src/main.jsx"))
         print("✅ Backed up original main.jsx to main.jsx.backup")
     
     # Write minimal main.jsx
-    with open("src/main.minimal.jsx", 'w') as f:
-        f.write(minimal_main)
+    (src_dir / "main.minimal.jsx").write_text(minimal_main)
     
     print("✅ Created src/main.minimal.jsx for testing")
     print("✅ Created src/App.minimal.test.jsx for testing")
@@ -327,36 +393,38 @@ def main():
     
     print(f"📁 Working directory: {os.getcwd()}")
     
-    # Run all checks
+    # Run all checks; a check whose prerequisite did not pass is skipped (None),
+    # since its outcome is already decided by the earlier failure. Only real
+    # dependencies are listed: components are read from the entry files
     checks = [
-        check_package_json,
-        check_vite_config, 
-        check_entry_files,
-        check_main_components,
-        check_node_modules,
-        create_minimal_test
+        (check_package_json, ()),
+        (check_vite_config, ()),
+        (check_entry_files, ()),
+        (check_main_components, (check_entry_files,)),
+        (check_node_modules, ()),
+        (create_minimal_test, ()),
     ]
     
-    results = []
-    for check in checks:
-        try:
-            result = check()
-            results.append(result)
-        except Exception as e:
-            print(f"❌ Check failed with error: {e}")
-            results.append(False)
+    results = {}
+    for check, requires in checks:
+        if not all(results[dep] for dep in requires):
+            print(f"\n⏭️  Skipping {check.__name__}: prerequisite check did not pass")
+            results[check] = None
+            continue
+        results[check] = check()
     
     # Summary
     print_header("DIAGNOSIS SUMMARY")
     
-    passed = sum(results)
+    failed = sum(1 for r in results.values() if r is False)
+    skipped = sum(1 for r in results.values() if r is None)
     total = len(results)
     
-    if passed == total:
+    if not failed and not skipped:
         print("🎉 All checks passed! The issue might be runtime-related.")
         print("💡 Try the minimal test app to isolate the problem.")
     else:
-        print(f"⚠️  {total - passed} issues found out of {total} checks")
+        print(f"⚠️  {failed} issues found out of {total} checks ({skipped} skipped)")
         print("💡 Fix the issues above and try again.")
     
     generate_debugging_commands()
@@ -4,22 +4,38 @@ API Testing Script for CrowdControl System
 Tests the complete data flow from frontend to backend
 """
 
-import requests
-import json
-import base64
-import os
-from pathlib import Path
+import argparse
+import functools
+import binascii
+import io
 
 # API Configuration
 API_BASE = "http://127.0.0.1:8000/api"
 TEST_USERNAME = "admin"
 TEST_PASSWORD = "admin123"
 
-def test_health_check():
+PROBES = ['health', 'auth', 'upload', 'cors', 'list', 'analysis']
+
+@functools.lru_cache(maxsize=None)
+def get_session():
+    """One keep-alive session shared by every probe, so they reuse a single connection.
+    requests is imported here, on first use, rather than at script start."""
+    import requests
+    
+    return requests.Session()
+
+_STATUS = {True: "✅ PASS", False: "❌ FAIL"}
+
+# A simple base64 encoded test frame, encoded once
+_FAKE_FRAME_B64 = binascii.b2a_base64(b"fake_image_data", newline=False).decode("ascii")
+
+def test_health_check(session=None):
     """Test if the API is healthy"""
+    session = session or get_session()
+
     print("[INFO] Testing health check...")
     try:
-        response = requests.get(f"{API_BASE}/health/")
+        response = session.get(f"{API_BASE}/health/")
         print(f"[PASS] Health check: {response.status_code}")
         print(f"   Response: {response.json()}")
         return response.status_code == 200
@@ -27,8 +43,10 @@ def test_health_check():
         print(f"[FAIL] Health check failed: {e}")
         return False
 
-def test_authentication():
+def test_authentication(session=None):
     """Test JWT authentication"""
+    session = session or get_session()
+
     print("\n[INFO] Testing authentication...")
     try:
         # Login
@@ -36,7 +54,7 @@ def test_authentication():
             "username": TEST_USERNAME,
             "password": TEST_PASSWORD
         }
-        response = requests.post(f"{API_BASE}/auth/login/", json=login_data)
+        response = session.post(f"{API_BASE}/auth/login/", json=login_data)
         print(f"[PASS] Login: {response.status_code}")
         
         if response.status_code == 200:
@@ -51,15 +69,17 @@ def test_authentication():
         print(f"[FAIL] Authentication failed: {e}")
         return None
 
-def test_cors_headers(token):
+def test_cors_headers(token, session=None):
     """Test CORS configuration"""
+    session = session or get_session()
+
     print("\n🌐 Testing CORS headers...")
     try:
         headers = {
             'Authorization': f'Bearer {token}',
             'Origin': 'http://localhost:5176'
         }
-        response = requests.options(f"{API_BASE}/media/list/", headers=headers)
+        response = session.options(f"{API_BASE}/media/list/", headers=headers)
         print(f"✅ CORS preflight: {response.status_code}")
         
         cors_headers = {
@@ -73,41 +93,35 @@ def test_cors_headers(token):
         print(f"❌ CORS test failed: {e}")
         return False
 
-def test_media_upload(token):
+def test_media_upload(token, session=None):
     """Test file upload functionality"""
+    session = session or get_session()
+
     print("\n📤 Testing media upload...")
     try:
-        # Create a test image file
-        test_image_path = Path("test_image.jpg")
-        if not test_image_path.exists():
-            # Create a simple test image using PIL
-            try:
-                from PIL import Image
-                import numpy as np
-                
-                # Create a simple test image
-                img_array = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
-                img = Image.fromarray(img_array)
-                img.save(test_image_path)
-                print(f"   Created test image: {test_image_path}")
-            except ImportError:
-                print("   PIL not available, skipping image creation")
-                return False
+        # Create a small test JPEG in memory (no temp file to write, reopen and delete)
+        try:
+            from PIL import Image
+        except ImportError:
+            print("   PIL not available, skipping image creation")
+            return False
+        
+        buf = io.BytesIO()
+        Image.new("RGB", (100, 100)).save(buf, format="JPEG")
+        buf.seek(0)
         
         # Upload the test image
         headers = {'Authorization': f'Bearer {token}'}
-        files = {'file': open(test_image_path, 'rb')}
+        files = {'file': ('test_image.jpg', buf, 'image/jpeg')}
         data = {
             'media_type': 'image',
             'description': 'Test upload from API verification',
             'location': 'Test Location'
         }
         
-        response = requests.post(f"{API_BASE}/media/upload/", 
+        response = session.post(f"{API_BASE}/media/upload/", 
                                headers=headers, files=files, data=data)
         
-        files['file'].close()  # Close the file
-        
         print(f"✅ Media upload: {response.status_code}")
         if response.status_code == 201:
             upload_data = response.json()
@@ -121,17 +135,15 @@ def test_media_upload(token):
     except Exception as e:
         print(f"❌ Media upload failed: {e}")
         return None
-    finally:
-        # Clean up test file
-        if test_image_path.exists():
-            test_image_path.unlink()
 
-def test_media_list(token):
+def test_media_list(token, session=None):
     """Test media listing"""
+    session = session or get_session()
+
     print("\n📋 Testing media list...")
     try:
         headers = {'Authorization': f'Bearer {token}'}
-        response = requests.get(f"{API_BASE}/media/list/", headers=headers)
+        response = session.get(f"{API_BASE}/media/list/", headers=headers)
         print(f"✅ Media list: {response.status_code}")
         
         if response.status_code == 200:
@@ -148,23 +160,22 @@ def test_media_list(token):
         print(f"❌ Media list failed: {e}")
         return False
 
-def test_frame_analysis(token):
+def test_frame_analysis(token, session=None):
     """Test live frame analysis"""
+    session = session or get_session()
+
     print("\n🎥 Testing frame analysis...")
     try:
-        # Create a simple base64 encoded test frame
-        test_frame = base64.b64encode(b"fake_image_data").decode('utf-8')
-        
         headers = {
             'Authorization': f'Bearer {token}',
             'Content-Type': 'application/json'
         }
         data = {
             'stream_id': 1,  # Assuming we have a stream
-            'frame_data': test_frame
+            'frame_data': _FAKE_FRAME_B64
         }
         
-        response = requests.post(f"{API_BASE}/analysis/frame/", 
+        response = session.post(f"{API_BASE}/analysis/frame/", 
                                headers=headers, json=data)
         print(f"✅ Frame analysis: {response.status_code}")
         
@@ -181,6 +192,11 @@ def test_frame_analysis(token):
 
 def main():
     """Run all API tests"""
+    parser = argparse.ArgumentParser(description="CrowdControl API verification")
+    parser.add_argument('--only', nargs='+', choices=PROBES, metavar='PROBE',
+                        help=f"run only these probes ({', '.join(PROBES)})")
+    selected = set(parser.parse_args().only or PROBES)
+    
     print("CrowdControl API Verification")
     print("=" * 50)
     
@@ -188,47 +204,45 @@ def main():
     results = {}
     
     # 1. Health Check
-    results['health'] = test_health_check()
-    
-    # 2. Authentication
-    token = test_authentication()
-    results['auth'] = token is not None
-    
-    if not token:
-        print("\n❌ Cannot continue without authentication token")
-        return
-    
-    # 3. CORS
-    results['cors'] = test_cors_headers(token)
-    
-    # 4. Media Upload
-    upload_id = test_media_upload(token)
-    results['upload'] = upload_id is not None
-    
-    # 5. Media List
-    results['list'] = test_media_list(token)
-    
-    # 6. Frame Analysis
-    results['analysis'] = test_frame_analysis(token)
+    if 'health' in selected:
+        results['health'] = test_health_check()
     
-    # Summary
-    print("\n" + "=" * 50)
-    print("📊 TEST RESULTS SUMMARY")
-    print("=" * 50)
+    # 2. Authentication (needed by every probe after health)
+    if selected - {'health'}:
+        token = test_authentication()
+        results['auth'] = token is not None
+        
+        if not token:
+            print("\n❌ Cannot continue without authentication token")
+            return
+        
+        # 3. Media Upload (the list below should include it)
+        if 'upload' in selected:
+            upload_id = test_media_upload(token)
+            results['upload'] = upload_id is not None
+        
+        # 4-6. CORS, Media List and Frame Analysis, in order so their output stays readable
+        probes = {
+            'cors': test_cors_headers,
+            'list': test_media_list,
+            'analysis': test_frame_analysis,
+        }
+        for name, probe in probes.items():
+            if name in selected:
+                results[name] = probe(token)
     
+    # Summary (built up front and written in one go)
     passed = sum(results.values())
     total = len(results)
     
-    for test, result in results.items():
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{test.upper():12} {status}")
-    
-    print(f"\nOVERALL: {passed}/{total} tests passed")
-    
+    lines = ["", "=" * 50, "📊 TEST RESULTS SUMMARY", "=" * 50]
+    lines += [f"{test.upper():12} {_STATUS[bool(result)]}" for test, result in results.items()]
+    lines += ["", f"OVERALL: {passed}/{total} tests passed"]
     if passed == total:
-        print("🎉 ALL TESTS PASSED! Your API is working perfectly.")
+        lines.append("🎉 ALL TESTS PASSED! Your API is working perfectly.")
     else:
-        print("⚠️ Some tests failed. Check the errors above.")
+        lines.append("⚠️ Some tests failed. Check the errors above.")
+    print("\n".join(lines))
 
 if __name__ == "__main__":
     main()